@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+import pytest
+import vcr
+from click.testing import CliRunner
+
+from helpers import endpoint
+from panoramic.cli import cli
+
+CASSETTES_DIR = Path(__file__).parent.parent / 'cassettes'
+SCENARIOS_DIR = Path(__file__).parents[3] / 'scenarios'
+BASELINE_FILE = Path(__file__).parent / 'baseline.json'
+
+# Allowed relative regression of wall time and peak memory against the baseline
+TOLERANCE = float(os.environ.get('PANO_BENCHMARK_TOLERANCE', '0.2'))
+# Record measured metrics as the new baseline instead of checking them
+UPDATE_BASELINE = os.environ.get('PANO_BENCHMARK_UPDATE_BASELINE') == '1'
+ROUNDS = int(os.environ.get('PANO_BENCHMARK_ROUNDS', '5'))
+
+def _drop_running_status(response):
+    """Drop status=RUNNING responses so polling delays do not dominate wall time."""
+    if b'RUNNING' in response['body']['string'] or b'METADATA_RETRIEVAL' in response['body']['string']:
+        return None
+
+    return response
+
+
+@pytest.fixture(scope='session')
+def vcr_config(vcr_config):
+    def before_record_response(response):
+        return _drop_running_status(vcr_config['before_record_response'](response))
+
+    return {**vcr_config, 'before_record_response': before_record_response}
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    """Load baseline metrics keyed by benchmark name, writing them back when updating the baseline."""
+    metrics = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    yield metrics
+    if UPDATE_BASELINE:
+        BASELINE_FILE.write_text(json.dumps(metrics, indent=2, sort_keys=True) + '\n')
+
+
+def _check_regressions(name, metrics, expected):
+    # A metric without baseline could regress unnoticed, so it fails the check as well
+    regressions = [
+        f'{metric}: no baseline recorded, run with PANO_BENCHMARK_UPDATE_BASELINE=1'
+        for metric in metrics
+        if metric not in expected
+    ]
+    regressions.extend(
+        f'{metric}: {metrics[metric]} > {expected[metric]} (+{TOLERANCE:.0%})'
+        for metric in ['wall_time', 'peak_memory']
+        if metric in metrics and metric in expected and metrics[metric] > expected[metric] * (1 + TOLERANCE)
+    )
+    # Replay is deterministic, so request counts are compared exactly
+    regressions.extend(
+        f'{request}: {count} requests > {expected.get("requests", {}).get(request, 0)}'
+        for request, count in metrics['requests'].items()
+        if count > expected.get('requests', {}).get(request, 0)
+    )
+    assert not regressions, f'{name} regressed:\n' + '\n'.join(regressions)
+
+
+@pytest.fixture
+def measure(benchmark, baseline, request):
+    """Return function benchmarking scenario against its baseline.
+
+    The scenario function returns counter of requests keyed by endpoint. Peak memory and requests are measured in one
+    traced run, wall time as median of untraced benchmark rounds.
+    """
+
+    def _measure(run, setup):
+        setup()
+        tracemalloc.start()
+        try:
+            requests = run()
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        benchmark.pedantic(run, setup=setup, rounds=ROUNDS)
+
+        metrics = {'peak_memory': peak_memory, 'requests': dict(sorted(requests.items()))}
+        # Stats are missing when benchmarks are disabled
+        if benchmark.stats:
+            metrics['wall_time'] = benchmark.stats['median']
+        benchmark.extra_info.update(metrics)
+
+        name = request.node.name
+        if UPDATE_BASELINE:
+            baseline[name] = metrics
+        else:
+            _check_regressions(name, metrics, baseline.get(name, {}))
+        return metrics
+
+    return _measure
+
+
+@pytest.fixture
+def workspace(monkeypatch, tmp_path):
+    """Return function preparing fresh configured home and copy of scenario as working directory."""
+
+    def _workspace(name=None):
+        for path in tmp_path.iterdir():
+            shutil.rmtree(path)
+
+        home_dir = tmp_path / 'home'
+        home_dir.mkdir()
+        monkeypatch.setattr(Path, 'home', lambda: home_dir)
+        result = CliRunner().invoke(cli, ['configure'], input='test-client-id\ntest-client-secret\ny')
+        assert result.exit_code == 0, result.output
+
+        if name is not None:
+            shutil.copytree(SCENARIOS_DIR / name, tmp_path / name)
+            monkeypatch.chdir(tmp_path / name)
+
+    return _workspace
+
+
+@pytest.fixture
+def replay(vcr_config):
+    """Return function running pano commands against cassette and counting replayed requests by endpoint.
+
+    Matching responses are served in recorded order. Once all of them were played the last one is repeated, so that
+    extra requests are counted as regressions instead of failing the replay.
+    """
+
+    def _replay(cassette, run):
+        requests = Counter()
+        played = Counter()
+        with vcr.VCR(**vcr_config).use_cassette(
+            str(CASSETTES_DIR / cassette), record_mode='none', allow_playback_repeats=True
+        ) as recording:
+
+            def play_in_order(vcr_request):
+                responses = recording.responses_of(vcr_request)
+                key = tuple(map(id, responses))
+                response = responses[min(played[key], len(responses) - 1)]
+                played[key] += 1
+                requests[endpoint(vcr_request.method, vcr_request.uri)] += 1
+                return response
+
+            recording.play_response = play_in_order
+            run(CliRunner())
+
+        return requests
+
+    return _replay
@@ -0,0 +1,93 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from helpers import create_cleanup_fields, create_project, run_connection_commands
+from panoramic.cli import analytics, cli, command
+from panoramic.cli.paths import Paths
+
+pytest.importorskip('pytest_benchmark')
+
+
+def _invoke(runner, args):
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0, result.output
+
+
+def test_scan_benchmark(measure, replay, workspace):
+    def scan(runner):
+        _invoke(
+            runner, ['scan', 'pano_snowflake_66', '--parallel', '1', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+        )
+
+    measure(lambda: replay('test_scan_e2e/test_scan_e2e.yaml', scan), setup=lambda: workspace('pano-scan'))
+
+
+def test_field_scaffold_benchmark(measure, replay, workspace):
+    def setup():
+        workspace('pano-field-scaffold')
+        for f in Paths.fields_dir(Path('test_dataset')).iterdir():
+            f.unlink()
+
+    def scaffold(runner):
+        _invoke(runner, ['field', 'scaffold', '-y'])
+
+    measure(lambda: replay('test_field_scaffold_e2e/test_field_scaffold_e2e.yaml', scaffold), setup=setup)
+
+
+def test_field_cleanup_benchmark(measure, replay, workspace):
+    def setup():
+        workspace('pano-field-cleanup')
+        create_cleanup_fields()
+
+    def cleanup(runner):
+        _invoke(runner, ['field', 'cleanup', '-y'])
+
+    measure(lambda: replay('test_field_cleanup_e2e/test_field_cleanup_e2e.yaml', cleanup), setup=setup)
+
+
+def test_push_pull_benchmark(measure, replay, workspace):
+    def push_pull(runner):
+        project_files = create_project()
+        _invoke(runner, ['push', '-y'])
+
+        for f in project_files:
+            f.unlink()
+        _invoke(runner, ['pull', '-y'])
+
+        for f in project_files:
+            f.unlink()
+        _invoke(runner, ['push', '-y'])
+
+    measure(
+        lambda: replay('test_push_pull_e2e/test_push_pull_e2e.yaml', push_pull),
+        setup=lambda: workspace('pano-push-pull'),
+    )
+
+
+def _offline(run):
+    """Run pano commands which make no requests and return empty counter of requests."""
+    run(CliRunner())
+    return Counter()
+
+
+def test_connections_benchmark(measure, workspace):
+    """Benchmark local connection commands, which run offline so there is no cassette to replay."""
+    measure(lambda: _offline(run_connection_commands), setup=workspace)
+
+
+def test_analytics_benchmark(measure, workspace, monkeypatch):
+    """Benchmark writing of analytics events by offline connection commands, flushing is disabled."""
+    # Enable writing of events without sending them anywhere
+    monkeypatch.setattr(analytics, 'config_is_enabled', lambda: True)
+    monkeypatch.setattr(command, 'analytics_module_is_enabled', lambda: True)
+    monkeypatch.setattr(analytics, '_flush', lambda: None)
+
+    def connection_commands(runner):
+        run_connection_commands(runner)
+        for i in range(analytics.MINIMAL_FLUSH_EVENTS):
+            _invoke(runner, ['connection', 'list'])
+
+    measure(lambda: _offline(connection_commands), setup=workspace)
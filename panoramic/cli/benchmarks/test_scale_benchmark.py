@@ -0,0 +1,74 @@
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from helpers import endpoint
+from mock_api import MockPanoramicAPI
+from panoramic.cli import cli
+from panoramic.cli.paths import Paths
+
+pytest.importorskip('pytest_benchmark')
+
+SCALE_TABLES = 2000
+SCALE_COLUMNS = 20
+SCALE_DATASETS = 100
+SCALE_MODELS_PER_DATASET = 10
+SCALE_FIELDS_PER_DATASET = 10
+SCALE_COMPANY_FIELDS = 1000
+
+
+@pytest.fixture(scope='module')
+def api_server():
+    with MockPanoramicAPI(tables=SCALE_TABLES, columns=SCALE_COLUMNS) as api:
+        yield api
+
+
+@pytest.fixture
+def api(api_server, monkeypatch):
+    """Mock Panoramic API with generated metadata, used by pano instead of the real one."""
+    for name, value in api_server.env().items():
+        monkeypatch.setenv(name, value)
+    api_server.reset()
+    yield api_server
+
+
+def _requests(api):
+    """Count requests served by the mock API by endpoint, keyed the same way as replayed requests."""
+    requests = Counter()
+    for (method, path), count in api.paths.items():
+        requests[endpoint(method, path)] += count
+    return requests
+
+
+def test_scan_scale_benchmark(api, measure, workspace):
+    def setup():
+        workspace('pano-scan')
+        api.reset()
+
+    def scan():
+        result = CliRunner().invoke(cli, ['scan', api.connection, '--parallel', '8', '--filter', 'SCALE_DB.PUBLIC.%'])
+        assert result.exit_code == 0, result.output
+        return _requests(api)
+
+    measure(scan, setup=setup)
+
+    assert len(list(Paths.scanned_dir().glob('*.model.yaml'))) == SCALE_TABLES
+
+
+def test_pull_scale_benchmark(api, measure, workspace):
+    def setup():
+        workspace('pano-push-pull')
+        api.reset()
+        api.populate(SCALE_DATASETS, SCALE_MODELS_PER_DATASET, SCALE_FIELDS_PER_DATASET, SCALE_COMPANY_FIELDS)
+
+    def pull():
+        result = CliRunner().invoke(cli, ['pull', '-y', '--parallel', '8'])
+        assert result.exit_code == 0, result.output
+        return _requests(api)
+
+    measure(pull, setup=setup)
+
+    assert len(list(Path.cwd().glob('scale_dataset_*/*.model.yaml'))) == SCALE_DATASETS * SCALE_MODELS_PER_DATASET
+    assert len(list(Paths.fields_dir(Path.cwd()).glob('*.field.yaml'))) == SCALE_COMPANY_FIELDS
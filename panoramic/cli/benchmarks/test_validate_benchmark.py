@@ -0,0 +1,107 @@
+import os
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from panoramic.cli import cli
+from panoramic.cli.paths import FileExtension, Paths, PresetFileName
+
+pytest.importorskip('pytest_benchmark')
+
+# Each dataset directory holds dataset.yaml, models and fields: 250 * (1 + 9 + 10) = 5000 files
+VALIDATE_DATASETS = 250
+VALIDATE_MODELS_PER_DATASET = 9
+VALIDATE_FIELDS_PER_DATASET = 10
+# Minimal speedup of validation over all cores per core, relative to a single process
+MIN_PARALLEL_EFFICIENCY = 0.5
+MAX_SCALING_CORES = 4
+
+VALIDATE_DATASET = """
+dataset_slug: validate_dataset_{d}
+display_name: Validate Dataset {d}
+"""
+
+VALIDATE_MODEL = """
+api_version: v1
+model_name: validate_model_{m}
+data_source: pano_snowflake_66.scale_db.public.table_{m:05d}
+fields:
+{fields}
+identifiers:
+  - validate_field_0
+"""
+
+VALIDATE_MODEL_FIELD = """  - field_map:
+      - validate_field_{f}
+    data_reference: '"COLUMN_{f}"'
+"""
+
+VALIDATE_FIELD = """
+aggregation:
+  type: sum
+api_version: v1
+slug: validate_field_{f}
+display_name: Validate field {f}
+group: Custom
+field_type: metric
+data_type: numeric
+"""
+
+
+@pytest.fixture
+def generated_project(workspace):
+    """Generate 5000 file project in a fresh workspace."""
+    workspace('pano-push-bulk')
+    model_fields = ''.join(VALIDATE_MODEL_FIELD.format(f=f) for f in range(VALIDATE_FIELDS_PER_DATASET))
+
+    for d in range(VALIDATE_DATASETS):
+        dataset_dir = Path(f'validate_dataset_{d}')
+        Paths.fields_dir(dataset_dir).mkdir(parents=True)
+        (dataset_dir / PresetFileName.DATASET_YAML.value).write_text(VALIDATE_DATASET.format(d=d))
+        for m in range(VALIDATE_MODELS_PER_DATASET):
+            model = VALIDATE_MODEL.format(m=m, fields=model_fields.rstrip('\n'))
+            (dataset_dir / f'validate_model_{m}{FileExtension.MODEL_YAML.value}').write_text(model)
+        for f in range(VALIDATE_FIELDS_PER_DATASET):
+            field = VALIDATE_FIELD.format(f=f)
+            (Paths.fields_dir(dataset_dir) / f'validate_field_{f}{FileExtension.FIELD_YAML.value}').write_text(field)
+
+
+def _validate(parallel):
+    result = CliRunner().invoke(cli, ['validate', '--parallel', str(parallel)])
+    assert result.exit_code == 0, result.output
+    # Validation is local only
+    return Counter()
+
+
+def _best_time(parallel, rounds=3):
+    times = []
+    for _ in range(rounds):
+        start = time.monotonic()
+        _validate(parallel)
+        times.append(time.monotonic() - start)
+    return min(times)
+
+
+def _available_cores():
+    # cpu_count ignores CPU affinity set by containers and taskset, which is only available on Linux
+    return len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+
+
+def test_validate_benchmark(generated_project, measure):
+    measure(lambda: _validate(_available_cores()), setup=lambda: None)
+
+
+def test_validate_scaling_benchmark(generated_project):
+    if os.environ.get('PYTEST_XDIST_WORKER'):
+        pytest.skip('Scaling is not measurable while xdist workers share the cores')
+    cores = min(_available_cores(), MAX_SCALING_CORES)
+    if cores < 2:
+        pytest.skip('Scaling needs at least two cores')
+
+    serial_time = _best_time(1)
+    parallel_time = _best_time(cores)
+
+    assert serial_time / parallel_time > cores * MIN_PARALLEL_EFFICIENCY
@@ -1,7 +1,14 @@
 import json
 import os
+import shutil
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit
 
 import pytest
+import yaml
+from fake_postgres import FakePostgres
+from mock_api import MockPanoramicAPI
 from panoramic.cli.config.auth import get_client_id, get_client_secret
 
 _TEST_JWT = (
@@ -11,6 +18,71 @@ _TEST_JWT = (
 )
 
 from panoramic.cli.context import get_company_slug
+from panoramic.cli.paths import Paths
+
+SCENARIOS_DIR = Path(__file__).parents[2] / 'scenarios'
+REPLAY_CREDENTIALS = {'client_id': 'test-client-id', 'client_secret': 'test-client-secret'}
+
+# Benchmarks are slow and compared against a machine-specific baseline, only collect them on request
+if os.environ.get('PANO_BENCHMARKS') != '1':
+    collect_ignore = ['benchmarks']
+
+
+def _snapshot(directory):
+    return {str(f.relative_to(directory)): f.read_bytes() for f in directory.rglob('*') if f.is_file()}
+
+
+@pytest.fixture(scope='session', autouse=True)
+def scenario_sources_unmodified():
+    """Check that tests change only their own copies of scenarios."""
+    before = _snapshot(SCENARIOS_DIR)
+    yield
+    after = _snapshot(SCENARIOS_DIR)
+    modified = sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+    assert not modified, f'Scenario sources were modified by tests: {modified}'
+
+
+@pytest.fixture(scope='session')
+def credentials(pytestconfig):
+    """Return credentials for isolated homes, real ones of the developer only when recording cassettes."""
+    if pytestconfig.getoption('--record-mode') == 'none':
+        return REPLAY_CREDENTIALS
+
+    if os.environ.get('PANO_CLIENT_ID') and os.environ.get('PANO_CLIENT_SECRET'):
+        return {'client_id': os.environ['PANO_CLIENT_ID'], 'client_secret': os.environ['PANO_CLIENT_SECRET']}
+
+    # Home is not isolated yet, so this is the developer's own config
+    if Paths.config_file().exists():
+        with Paths.config_file().open() as f:
+            auth = (yaml.safe_load(f) or {}).get('auth', {})
+        if auth.get('client_id') and auth.get('client_secret'):
+            return {'client_id': auth['client_id'], 'client_secret': auth['client_secret']}
+
+    return REPLAY_CREDENTIALS
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(monkeypatch, tmp_path, credentials):
+    """Give each test its own configured home directory so that tests can run in parallel."""
+    home_dir = tmp_path / 'home'
+    monkeypatch.setattr(Path, 'home', lambda: home_dir)
+    Paths.config_file().parent.mkdir(parents=True)
+    with Paths.config_file().open('w') as f:
+        yaml.safe_dump({'auth': credentials}, f)
+    return home_dir
+
+
+@pytest.fixture
+def scenario(monkeypatch, tmp_path):
+    """Return function copying scenario into temporary workspace and making it the working directory."""
+
+    def _scenario(name):
+        workspace = tmp_path / 'scenarios' / name
+        shutil.copytree(SCENARIOS_DIR / name, workspace)
+        monkeypatch.chdir(workspace)
+        return workspace
+
+    return _scenario
 
 
 @pytest.fixture(autouse=True)
@@ -19,6 +91,7 @@ def clear_context_cache():
     get_client_secret.cache_clear()
     get_company_slug.cache_clear()
     os.environ.setdefault('PANO_ANALYTICS_ENABLED', 'false')
+    os.environ.setdefault('PANO_UPDATE_CHECK_ENABLED', 'false')
 
 
 def scrub_access_token(response):
@@ -30,6 +103,101 @@ def scrub_access_token(response):
     return response
 
 
+def _conditional_headers(r1, r2):
+    """Match requests on cache validators, so conditional requests replay only recorded revalidations."""
+    for header in ['If-None-Match', 'If-Modified-Since']:
+        assert r1.headers.get(header) == r2.headers.get(header)
+
+
+def pytest_recording_configure(config, vcr):
+    vcr.register_matcher('conditional_headers', _conditional_headers)
+
+
 @pytest.fixture(scope='session')
 def vcr_config():
     return {'filter_headers': ['authorization'], 'before_record_response': scrub_access_token}
+
+
+@pytest.fixture
+def count_requests(vcr):
+    """Count requests replayed from the cassette, optionally filtered by method and URL fragment."""
+
+    def _count_requests(method=None, url_part=''):
+        return sum(
+            vcr.play_counts[index]
+            for index, (request, _) in enumerate(vcr.data)
+            if (method is None or request.method == method) and url_part in request.uri
+        )
+
+    return _count_requests
+
+
+@pytest.fixture
+def replayed_requests(vcr):
+    """Return counter of requests replayed from the cassette keyed by method and URL path."""
+
+    def _replayed_requests():
+        requests = Counter()
+        for index, (request, _) in enumerate(vcr.data):
+            if vcr.play_counts[index]:
+                requests[request.method, urlsplit(request.uri).path] += vcr.play_counts[index]
+        return requests
+
+    return _replayed_requests
+
+
+@pytest.fixture
+def trace_file(monkeypatch, tmp_path):
+    """Enable performance tracing of pano commands into temporary JSON lines file."""
+    path = tmp_path / 'trace.jsonl'
+    monkeypatch.setenv('PANO_TRACE', str(path))
+    return path
+
+
+@pytest.fixture
+def read_trace(trace_file):
+    """Return function splitting the trace into span records and counter of traced requests."""
+
+    def _read_trace():
+        with trace_file.open() as f:
+            records = [json.loads(line) for line in f]
+
+        spans = [record for record in records if record['type'] == 'span']
+        requests = Counter(
+            (record['method'], urlsplit(record['url']).path) for record in records if record['type'] == 'request'
+        )
+        return spans, requests
+
+    return _read_trace
+
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    """Return function starting local mock Panoramic API with given options and pointing pano at it."""
+    servers = []
+
+    def _mock_api(**options):
+        api = MockPanoramicAPI(**options).start()
+        servers.append(api)
+        for name, value in api.env().items():
+            monkeypatch.setenv(name, value)
+        return api
+
+    yield _mock_api
+    for api in servers:
+        api.stop()
+
+
+@pytest.fixture
+def fake_postgres():
+    """Return function starting fake postgres server for given options."""
+    servers = []
+
+    def _fake_postgres(**options):
+        server = FakePostgres(**options).start()
+        servers.append(server)
+        return server
+
+    yield _fake_postgres
+    for server in servers:
+        server.stop()
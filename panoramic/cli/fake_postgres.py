@@ -0,0 +1,152 @@
+"""Local stand-in for a postgres server, used to test connections without a database.
+
+It speaks enough of the postgres frontend/backend protocol for a client to authenticate and run simple queries. Every
+select returns single row, answers to `version()` and `show` queries look like a real server.
+"""
+import socketserver
+import struct
+import threading
+import time
+
+SERVER_VERSION = 'PostgreSQL 12.4 on x86_64-pc-linux-gnu, compiled by gcc, 64-bit'
+PARAMETERS = {
+    'server_version': '12.4',
+    'server_encoding': 'UTF8',
+    'client_encoding': 'UTF8',
+    'DateStyle': 'ISO, MDY',
+    'integer_datetimes': 'on',
+    'standard_conforming_strings': 'on',
+}
+SSL_REQUEST_CODE = 80877103
+GSSENC_REQUEST_CODE = 80877104
+
+
+def _message(kind, payload=b''):
+    return kind + struct.pack('!I', len(payload) + 4) + payload
+
+
+def _string(value):
+    return value.encode() + b'\x00'
+
+
+_READY_FOR_QUERY = _message(b'Z', b'I')
+
+
+def _query_result(query):
+    """Return single value answering simple select or show query."""
+    query = query.lower()
+    if 'version()' in query:
+        return SERVER_VERSION
+    if query.startswith('show '):
+        return PARAMETERS.get(query[len('show ') :].strip(' ;'), 'on')
+    return '1'
+
+
+class _PostgresHandler(socketserver.BaseRequestHandler):
+    def _read(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('Client closed connection')
+            data += chunk
+        return data
+
+    def _startup(self):
+        """Read startup message, declining SSL and GSSAPI encryption when client asks for them first."""
+        while True:
+            (length,) = struct.unpack('!I', self._read(4))
+            payload = self._read(length - 4)
+            if struct.unpack('!I', payload[:4])[0] not in (SSL_REQUEST_CODE, GSSENC_REQUEST_CODE):
+                return
+            self.request.sendall(b'N')
+
+    def _query(self, query):
+        command = query.strip().split(maxsplit=1)[0].upper() if query.strip() else 'EMPTY'
+        # Transaction control and settings return no rows
+        if command not in ('SELECT', 'SHOW'):
+            return _message(b'C', _string(command)) + _READY_FOR_QUERY
+
+        value = _query_result(query).encode()
+        row_description = struct.pack('!H', 1) + _string('?column?') + struct.pack('!IHIhih', 0, 0, 25, -1, -1, 0)
+        data_row = struct.pack('!HI', 1, len(value)) + value
+        return (
+            _message(b'T', row_description)
+            + _message(b'D', data_row)
+            + _message(b'C', _string('SELECT 1'))
+            + _READY_FOR_QUERY
+        )
+
+    def handle(self):
+        server = self.server.postgres
+        server._count('connections')
+        try:
+            self._startup()
+            if server.hang:
+                server._closed.wait()
+                return
+            time.sleep(server.delay)
+
+            response = _message(b'R', struct.pack('!I', 0))
+            for name, value in PARAMETERS.items():
+                response += _message(b'S', _string(name) + _string(value))
+            response += _message(b'K', struct.pack('!II', 1, 1)) + _READY_FOR_QUERY
+            self.request.sendall(response)
+
+            while True:
+                kind = self._read(1)
+                (length,) = struct.unpack('!I', self._read(4))
+                payload = self._read(length - 4)
+                if kind == b'X':
+                    return
+                if kind == b'Q':
+                    server._count('queries')
+                    self.request.sendall(self._query(payload.rstrip(b'\x00').decode()))
+                else:
+                    error = _string('SERROR') + _string('C0A000') + _string(f'Unsupported message {kind!r}') + b'\x00'
+                    self.request.sendall(_message(b'E', error) + _READY_FOR_QUERY)
+        except ConnectionError:
+            pass
+
+
+class FakePostgres:
+    """Fake postgres server answering authentication after `delay` seconds, or never when `hang` is set."""
+
+    def __init__(self, delay=0.0, hang=False):
+        self.delay = delay
+        self.hang = hang
+        self.connections = 0
+        self.queries = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._server = None
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def start(self):
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _PostgresHandler)
+        self._server.daemon_threads = True
+        self._server.postgres = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._closed.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
@@ -0,0 +1,159 @@
+"""Helpers shared by e2e test modules and benchmarks."""
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from panoramic.cli import cli
+from panoramic.cli.paths import FileExtension, Paths, PresetFileName
+
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+TEST_DATASET = """
+dataset_slug: test_dataset
+display_name: Test Dataset
+"""
+
+TEST_MODEL = """
+api_version: v1
+model_name: test_model
+data_source: pano_snowflake_panoramic_cli_e_2_e_c_2_m_6_qp_4_u.snowflake_sample_data.tpch_sf1.nation
+fields:
+  - field_map:
+      - dataset_test_field
+    data_reference: '"N_NAME"'
+joins:
+  - to_model: other_model
+    relationship: many_to_one
+    join_type: left
+    fields:
+      - dataset_test_field
+identifiers:
+  - dataset_test_field
+"""
+
+TEST_COMPANY_FIELD = """
+aggregation:
+  type: group_by
+api_version: v1
+slug: company_test_field
+display_name: Company test field
+group: Custom
+calculation: 2 + 2
+field_type: dimension
+data_type: text
+"""
+
+TEST_DATASET_FIELD = """
+aggregation:
+  type: sum
+api_version: v1
+slug: dataset_test_field
+display_name: Dataset test field
+group: Custom
+field_type: metric
+data_type: text
+"""
+
+TEST_CALCULATED_FIELD = """
+api_version: v1
+slug: calculated_test_field
+display_name: Dataset test field
+group: Custom
+calculation: 10
+field_type: metric
+data_type: text
+"""
+
+TEST_ORPHANED_FIELD = """
+api_version: v1
+slug: orphan_test_field
+display_name: Dataset test field
+group: Custom
+field_type: metric
+data_type: text
+"""
+
+
+def endpoint(method, url):
+    """Return endpoint key of request with ids replaced by placeholder."""
+    return f'{method} {_UUID_RE.sub("{id}", urlsplit(url).path)}'
+
+
+def create_project():
+    """Write dataset, model and fields into the current scenario directory and return their paths."""
+    dataset_dir = Path('test_dataset')
+    dataset_file: Path = dataset_dir / PresetFileName.DATASET_YAML.value
+    model_file: Path = dataset_dir / f'test_model{FileExtension.MODEL_YAML.value}'
+
+    # Create company scoped field
+    company_fields_dir = Paths.fields_dir(Path.cwd())
+    company_fields_dir.mkdir(exist_ok=True)
+    company_field_file: Path = company_fields_dir / f'company_test_field{FileExtension.FIELD_YAML.value}'
+    company_field_file.write_text(TEST_COMPANY_FIELD)
+
+    # Create dataset and model to push
+    dataset_dir.mkdir(exist_ok=True)
+    dataset_file.write_text(TEST_DATASET)
+    model_file.write_text(TEST_MODEL)
+    # Create dataset scoped field
+    dataset_fields_dir = Paths.fields_dir(dataset_dir)
+    dataset_fields_dir.mkdir(exist_ok=True)
+
+    dataset_field_file: Path = dataset_fields_dir / f'dataset_test_field{FileExtension.FIELD_YAML.value}'
+    dataset_field_file.write_text(TEST_DATASET_FIELD)
+
+    return dataset_file, model_file, company_field_file, dataset_field_file
+
+
+def project_tree():
+    """Return contents of all pulled files in the current scenario directory keyed by relative path."""
+    return {
+        str(f): f.read_text()
+        for f in sorted(Path.cwd().rglob('*.yaml'))
+        if f.name != 'pano.yaml' and f != Paths.push_state_file().absolute()
+    }
+
+
+def create_cleanup_fields():
+    """Write orphaned and calculated dataset fields into the current pano-field-cleanup scenario directory."""
+    fields_dir = Paths.fields_dir(Path('test_dataset'))
+    (fields_dir / 'orphan_test_field.field.yaml').write_text(TEST_ORPHANED_FIELD)
+    (fields_dir / 'calculated_test_field.field.yaml').write_text(TEST_CALCULATED_FIELD)
+
+
+def run_connection_commands(runner):
+    """Run a typical create -> list -> update -> remove sequence of connection commands."""
+    runner.invoke(cli, ['configure'], input='test-client-id\ntest-client-secret')
+    result = runner.invoke(
+        cli,
+        [
+            'connection',
+            'create',
+            'my-connection',
+            '--type',
+            'postgres',
+            '--user',
+            'my-user',
+            '--host',
+            'localhost',
+            '--port',
+            '5432',
+            '--database',
+            'my_db',
+            '--password',
+            'my-password',
+            '--no-test',
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+    for i in range(5):
+        result = runner.invoke(cli, ['connection', 'list'])
+        assert result.exit_code == 0, result.output
+        result = runner.invoke(
+            cli, ['connection', 'update', 'my-connection', '--database', f'my-new-db-{i}', '--no-test']
+        )
+        assert result.exit_code == 0, result.output
+
+    result = runner.invoke(cli, ['connection', 'remove', 'my-connection'])
+    assert result.exit_code == 0, result.output
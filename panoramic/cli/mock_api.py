@@ -0,0 +1,429 @@
+"""Local stand-in for the Panoramic API serving generated large-scale scenarios.
+
+Pano is pointed at the server through the environment returned by `MockPanoramicAPI.env()`. Run this module to serve
+the API for manual load testing, e.g. `python mock_api.py --tables 5000 --latency 0.05`.
+"""
+import argparse
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = '/api/v1/federated'
+TOKEN_PATH = '/oauth2/auscsj124wDoFObOJ4x6/v1/token'
+TEST_JWT = (
+    'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.'
+    'eyJzdWIiOiIxMjM0NTY3ODkwIiwibmFtZSI6IkpvaG4gRG9lIiwiaWF0IjoxNTE2MjM5MDIyfQ.'
+    'SflKxwRJSMeKKF2QT4fwpMeJf36POk6yJV_adQssw5c'
+)
+
+
+def _like_to_regex(table_filter):
+    """Convert SQL LIKE table filter to compiled case-insensitive regex."""
+    return re.compile('^' + re.escape(table_filter).replace('%', '.*').replace('_', '.') + '$', re.IGNORECASE)
+
+
+def _route_regex(template):
+    """Convert route template with {name} placeholders to compiled regex matching full request path."""
+    if template == TOKEN_PATH:
+        return re.compile(re.escape(template))
+    return re.compile(re.escape(API_PREFIX) + re.sub(r'\\{(\w+)\\}', r'(?P<\1>[^/]+)', re.escape(template)))
+
+
+def _field(slug, field_type='dimension', **kwargs):
+    """Return field as returned by taxonomy API."""
+    aggregation_type = 'group_by' if field_type == 'dimension' else 'sum'
+    return {
+        'acronym': None,
+        'aggregation': {'type': aggregation_type},
+        'aggregation_type': aggregation_type,
+        'calculation': None,
+        'data_type': 'text',
+        'description': None,
+        'display_format': None,
+        'display_name': slug,
+        'field_type': field_type,
+        'group': 'Custom',
+        'slug': slug,
+        'taxon_type': field_type,
+        'validation_type': 'text',
+        **kwargs,
+    }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length)
+        body = json.loads(data) if data and 'json' in self.headers.get('Content-Type', '') else None
+
+        status, payload, headers = self.server.api.dispatch(self.command, url.path, parse_qs(url.query), body)
+
+        data = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockPanoramicAPI:
+    """In-memory Panoramic API with generated metadata for `tables` tables of `columns` columns.
+
+    Every response is delayed by `latency` seconds and metadata jobs stay RUNNING for `job_duration` seconds. With
+    `rate_limit` set, requests above that many per second are rejected with 429 Too Many Requests.
+    """
+
+    def __init__(
+        self,
+        tables=0,
+        columns=10,
+        schema='SCALE_DB.PUBLIC',
+        connection='pano_snowflake_66',
+        latency=0.0,
+        job_duration=0.0,
+        rate_limit=None,
+    ):
+        self.connection = connection
+        self.table_names = [f'{schema}.TABLE_{t:05d}' for t in range(tables)]
+        self.columns = columns
+        self.latency = latency
+        self.job_duration = job_duration
+        self.rate_limit = rate_limit
+        self.requests = Counter()
+        self.paths = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._routes = [
+            (method, template, _route_regex(template), handler)
+            for method, template, handler in [
+                ('POST', TOKEN_PATH, self._token),
+                ('GET', '/physical-data-source/', self._list_physical_data_sources),
+                ('POST', '/metadata/{connection}/tables', self._tables_job),
+                ('POST', '/metadata/{connection}/refresh', self._refresh_job),
+                ('POST', '/metadata/{connection}/columns', self._columns_job),
+                ('GET', '/metadata/job/{job_id}', self._job_status),
+                ('GET', '/metadata/job/{job_id}/results', self._job_results),
+                ('POST', '/identifier/{connection}', self._identifier_job),
+                ('POST', '/identifier/{connection}/batch', self._identifier_batch_job),
+                ('GET', '/identifier/job/{job_id}', self._identifier_job_status),
+                ('GET', '/virtual-data-source', self._list_virtual_data_sources),
+                ('PUT', '/virtual-data-source', self._upsert_virtual_data_source),
+                ('PUT', '/virtual-data-source/batch', self._upsert_virtual_data_sources),
+                ('DELETE', '/virtual-data-source/{slug}', self._delete_virtual_data_source),
+                ('POST', '/virtual-data-source/delete', self._delete_virtual_data_sources),
+                ('GET', '/model/', self._list_models),
+                ('PUT', '/model/', self._upsert_model),
+                ('PUT', '/model/batch', self._upsert_models),
+                ('DELETE', '/model/{name}', self._delete_model),
+                ('POST', '/model/delete', self._delete_models),
+                ('GET', '/taxonomy/taxons', self._list_taxons),
+                ('POST', '/taxonomy/taxons', self._upsert_taxons),
+                ('POST', '/taxonomy/taxons/delete', self._delete_taxons),
+            ]
+        ]
+        self.reset()
+
+    def reset(self):
+        """Forget all stored objects, jobs and counted requests."""
+        with self._lock:
+            self.requests.clear()
+            self.paths.clear()
+            self.throttled = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self._window = (0, 0)
+            self.jobs = {}
+            self.virtual_data_sources = {}
+            self.models = {}
+            self.taxons = {}
+
+    def populate(self, datasets=0, models_per_dataset=0, fields_per_dataset=0, company_fields=0):
+        """Store generated datasets with their models and fields, models reading the generated tables."""
+        if datasets and models_per_dataset and not self.table_names:
+            raise ValueError('Models need tables to read, create the API with tables > 0')
+        with self._lock:
+            for d in range(datasets):
+                dataset = f'scale_dataset_{d}'
+                self.virtual_data_sources[dataset] = {'slug': dataset, 'display_name': f'Scale Dataset {d}'}
+
+                field_slugs = [f'dataset_field_{f}' for f in range(fields_per_dataset)]
+                for slug in field_slugs:
+                    self.taxons[f'{dataset}|{slug}'] = _field(f'{dataset}|{slug}', 'metric', data_source=dataset)
+
+                for m in range(models_per_dataset):
+                    table = self.table_names[(d * models_per_dataset + m) % len(self.table_names)]
+                    self.models[dataset, f'scale_model_{m}'] = {
+                        'model_name': f'scale_model_{m}',
+                        'data_source': f'{self.connection}.{table}'.lower(),
+                        'fields': [
+                            {'field_map': [slug], 'data_reference': f'"COLUMN_{i}"'}
+                            for i, slug in enumerate(field_slugs)
+                        ],
+                        'identifiers': [],
+                        'joins': [],
+                        'visibility': 'available',
+                    }
+
+            for f in range(company_fields):
+                self.taxons[f'company_field_{f}'] = _field(f'company_field_{f}', calculation='1 + 1')
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.api = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def env(self):
+        """Environment variables pointing pano at this server."""
+        return {'PANO_API_BASE_URL': self.url + API_PREFIX + '/', 'PANO_AUTH_TOKEN_URL': self.url + TOKEN_PATH}
+
+    def _is_throttled(self):
+        """Count request into current one second window and return whether it exceeds the rate limit."""
+        second = int(time.monotonic())
+        window, count = self._window
+        self._window = (second, count + 1 if window == second else 1)
+        return self.rate_limit is not None and self._window[1] > self.rate_limit
+
+    def dispatch(self, method, path, query, body):
+        """Route request to its handler and return status code, JSON payload and extra headers."""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            for route_method, template, regex, handler in self._routes:
+                match = regex.fullmatch(path)
+                if route_method == method and match:
+                    with self._lock:
+                        if self._is_throttled():
+                            self.throttled += 1
+                            return 429, {'error': 'Too many requests'}, {'Retry-After': '1'}
+                        self.requests[f'{method} {template}'] += 1
+                        self.paths[method, path] += 1
+                        try:
+                            status, payload, *headers = handler(query=query, body=body, **match.groupdict())
+                        except Exception as e:
+                            # Answer instead of dropping the connection, so that the client sees the failure
+                            return 500, {'error': f'{type(e).__name__}: {e}'}, {}
+                        return status, payload, headers[0] if headers else {}
+            return 404, {'error': f'No route for {method} {path}'}, {}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _token(self, **kwargs):
+        return 200, {'token_type': 'Bearer', 'expires_in': 3600, 'access_token': TEST_JWT, 'scope': 'platform'}
+
+    def _list_physical_data_sources(self, **kwargs):
+        return 200, {'data': [{'display_name': self.connection, 'source_name': self.connection}]}
+
+    def _submit_job(self, result):
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = (result, time.monotonic() + self.job_duration)
+        return 200, {'data': {'job_id': job_id}}
+
+    def _job_remaining(self, job_id):
+        """Return seconds until job completes."""
+        _, completed_at = self.jobs[job_id]
+        return max(0.0, completed_at - time.monotonic())
+
+    def _matching_tables(self, query, param):
+        regex = _like_to_regex(query[param][0])
+        return [name for name in self.table_names if regex.match(name)]
+
+    def _tables_job(self, query, connection, **kwargs):
+        return self._submit_job(
+            [
+                {'data_source': f'{connection}.{name}', 'model_name': f'{connection}.{name}'.lower()}
+                for name in self._matching_tables(query, 'table_filter')
+            ]
+        )
+
+    def _refresh_job(self, **kwargs):
+        return self._submit_job([])
+
+    def _columns_job(self, query, connection, **kwargs):
+        return self._submit_job(
+            [
+                {
+                    'aggregation_type': 'sum',
+                    'data_reference': f'"COLUMN_{c}"',
+                    'data_source': f'{connection}.{name}',
+                    'data_type': 'DECIMAL',
+                    'field_map': [f'column_{c}'],
+                    'model_name': f'{connection}.{name}'.lower(),
+                    'taxon_type': 'metric',
+                    'validation_type': 'numeric',
+                }
+                for name in self._matching_tables(query, 'table_filter')
+                for c in range(self.columns)
+            ]
+        )
+
+    def _job_status(self, job_id, **kwargs):
+        if job_id not in self.jobs:
+            return 404, {'error': f'Unknown job {job_id}'}
+        remaining = self._job_remaining(job_id)
+        if remaining:
+            return 200, {'data': {'job_status': 'RUNNING'}}, {'Retry-After': str(math.ceil(remaining))}
+        return 200, {'data': {'job_status': 'COMPLETED'}}
+
+    def _job_results(self, query, job_id, **kwargs):
+        offset, limit = int(query['offset'][0]), int(query['limit'][0])
+        rows, _ = self.jobs[job_id]
+        return 200, {'data': rows[offset : offset + limit]}
+
+    def _identifier_job(self, **kwargs):
+        return self._submit_job(['COLUMN_0'])
+
+    def _identifier_batch_job(self, body, **kwargs):
+        return self._submit_job({table: ['COLUMN_0'] for table in body['tables']})
+
+    def _identifier_job_status(self, job_id, **kwargs):
+        if job_id not in self.jobs:
+            return 404, {'error': f'Unknown job {job_id}'}
+        identifiers, _ = self.jobs[job_id]
+        remaining = self._job_remaining(job_id)
+        if remaining:
+            # Batch jobs map tables to identifiers, single table jobs list them
+            data = {'identifiers': type(identifiers)(), 'job_id': job_id, 'status': 'RUNNING'}
+            return 200, {'data': data}, {'Retry-After': str(math.ceil(remaining))}
+        return 200, {'data': {'identifiers': identifiers, 'job_id': job_id, 'status': 'COMPLETED'}}
+
+    @staticmethod
+    def _page(items, query):
+        offset, limit = int(query.get('offset', ['0'])[0]), int(query.get('limit', ['100'])[0])
+        return 200, {'data': list(items)[offset : offset + limit]}
+
+    def _list_virtual_data_sources(self, query, **kwargs):
+        return self._page(self.virtual_data_sources.values(), query)
+
+    def _upsert_virtual_data_source(self, body, **kwargs):
+        self.virtual_data_sources[body['slug']] = body
+        return 201, {'data': body}
+
+    def _upsert_virtual_data_sources(self, body, **kwargs):
+        for dataset in body:
+            self.virtual_data_sources[dataset['slug']] = dataset
+        return 200, {'data': [{**dataset, 'status': 'ok'} for dataset in body]}
+
+    def _delete_virtual_data_source(self, slug, **kwargs):
+        self.virtual_data_sources.pop(slug, None)
+        self.models = {key: model for key, model in self.models.items() if key[0] != slug}
+        return 204, None
+
+    def _delete_virtual_data_sources(self, body, **kwargs):
+        for slug in body:
+            self._delete_virtual_data_source(slug)
+        return 204, None
+
+    def _list_models(self, query, **kwargs):
+        dataset = query.get('virtual_data_source', [None])[0]
+        if dataset is None:
+            return 400, {'error': 'Missing virtual_data_source query parameter'}
+        return self._page((model for (vds, _), model in self.models.items() if vds == dataset), query)
+
+    def _upsert_model(self, query, body, **kwargs):
+        self.models[query['virtual_data_source'][0], body['model_name']] = body
+        return 204, None
+
+    def _upsert_models(self, body, **kwargs):
+        results = []
+        for model in body:
+            model = dict(model)
+            dataset = model.pop('virtual_data_source')
+            self.models[dataset, model['model_name']] = model
+            results.append({'virtual_data_source': dataset, 'model_name': model['model_name'], 'status': 'ok'})
+        return 200, {'data': results}
+
+    def _delete_model(self, query, name, **kwargs):
+        self.models.pop((query['virtual_data_source'][0], name), None)
+        return 204, None
+
+    def _delete_models(self, body, **kwargs):
+        for model in body:
+            self.models.pop((model['virtual_data_source'], model['model_name']), None)
+        return 204, None
+
+    def _list_taxons(self, query, **kwargs):
+        return self._page(self.taxons.values(), query)
+
+    def _upsert_taxons(self, body, **kwargs):
+        # Pano sends taxons as a plain list, a list wrapped in data is accepted as well
+        taxons = body['data'] if isinstance(body, dict) else body
+        for taxon in taxons:
+            self.taxons[taxon['slug']] = taxon
+        return 200, {'data': taxons}
+
+    def _delete_taxons(self, body, **kwargs):
+        for slug in body:
+            self.taxons.pop(slug, None)
+        return 204, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve mock Panoramic API until interrupted.')
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--datasets', type=int, default=0)
+    parser.add_argument('--models-per-dataset', type=int, default=0)
+    parser.add_argument('--fields-per-dataset', type=int, default=0)
+    parser.add_argument('--company-fields', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='Delay of every response in seconds')
+    parser.add_argument('--job-duration', type=float, default=0.0, help='Seconds metadata jobs stay RUNNING')
+    parser.add_argument('--rate-limit', type=int, default=None, help='Requests per second before 429 responses')
+    args = parser.parse_args()
+
+    api = MockPanoramicAPI(
+        tables=args.tables,
+        columns=args.columns,
+        latency=args.latency,
+        job_duration=args.job_duration,
+        rate_limit=args.rate_limit,
+    )
+    api.populate(args.datasets, args.models_per_dataset, args.fields_per_dataset, args.company_fields)
+    with api:
+        for name, value in api.env().items():
+            print(f'export {name}={value}', flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    print(dict(api.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 
@@ -11,13 +13,73 @@ from panoramic.cli.paths import Paths
 from panoramic.cli import analytics
 from panoramic.cli import command
 
+LARGE_LOG_EVENTS = 100_000
+# Events appended per timed round and rounds of which the best one is taken
+APPEND_SAMPLES = 1_000
+APPEND_ROUNDS = 5
+FLUSH_DURATION = 3
+FLUSH_TIMEOUT = 5
+
+
+@pytest.fixture
+def analytics_enabled(monkeypatch, tmpdir):
+    monkeypatch.setattr(Path, 'home', lambda: Path(tmpdir))
+    # Enable writing of events
+    monkeypatch.setattr(analytics, 'config_is_enabled', lambda: True)
+    # Enabled prompt
+    monkeypatch.setattr(command, 'analytics_module_is_enabled', lambda: True)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['configure'], input='test-client-id\ntest-client-secret\ny')
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(
+        cli,
+        [
+            'connection',
+            'create',
+            'my-connection',
+            '--type',
+            'postgres',
+            '--user',
+            'my-user',
+            '--host',
+            'localhost',
+            '--port',
+            '5432',
+            '--database',
+            'my_db',
+            '--password',
+            'my-password',
+            '--no-test',
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    yield runner
+
+
+def _recorded_event():
+    """Return the last event written to the log by a command."""
+    with Paths.analytics_events_file().open() as f:
+        return json.loads(f.readlines()[-1])
+
+
+def _append_time(event):
+    """Return best wall time of appending APPEND_SAMPLES events over APPEND_ROUNDS rounds."""
+    times = []
+    for _ in range(APPEND_ROUNDS):
+        start = time.perf_counter()
+        for _ in range(APPEND_SAMPLES):
+            analytics.write_event(event)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
 
 @pytest.mark.vcr
 def test_analytics_e2e(monkeypatch, tmpdir):
-    flushed = False
+    flushed = threading.Event()
+
     def flush_mock():
-        nonlocal flushed
-        flushed = True
+        flushed.set()
 
     monkeypatch.setattr(Path, 'home', lambda: Path(tmpdir))
     monkeypatch.setattr(analytics, '_flush', flush_mock)
@@ -72,7 +134,8 @@ def test_analytics_e2e(monkeypatch, tmpdir):
         )
         assert result.exit_code == 0, result.output
 
-    assert flushed is True
+    # Flush runs in the background after the command crossing the threshold returns
+    assert flushed.wait(timeout=FLUSH_TIMEOUT)
     assert len(analytics._read_events()) == 11
 
     with Paths.analytics_events_file().open() as f:
@@ -82,3 +145,42 @@ def test_analytics_e2e(monkeypatch, tmpdir):
         for line in lines[1:]:
             data = json.loads(line)
             assert data['name'] == 'connection update'
+
+
+def test_analytics_append_cost_e2e(analytics_enabled, monkeypatch):
+    monkeypatch.setattr(analytics, '_flush', lambda: None)
+    # Event of the connection created by the fixture
+    event = _recorded_event()
+
+    small_log_time = _append_time(event)
+
+    # Grow the log past 100k events through the writer, so its size tracking and rotation stay consistent
+    for _ in range(LARGE_LOG_EVENTS):
+        analytics.write_event(event)
+
+    large_log_time = _append_time(event)
+
+    # Appending an event does not re-read the existing log
+    assert large_log_time < 2 * small_log_time
+
+
+def test_analytics_flush_non_blocking_e2e(analytics_enabled, monkeypatch):
+    flushed = threading.Event()
+
+    def flush_mock():
+        time.sleep(FLUSH_DURATION)
+        flushed.set()
+
+    monkeypatch.setattr(analytics, '_flush', flush_mock)
+    runner = analytics_enabled
+
+    for i in range(analytics.MINIMAL_FLUSH_EVENTS):
+        start = time.monotonic()
+        result = runner.invoke(
+            cli, ['connection', 'update', 'my-connection', '--database', f'my-new-db-{i}', '--no-test']
+        )
+        assert result.exit_code == 0, result.output
+        # Command crossing the flush threshold returns before the upload finishes
+        assert time.monotonic() - start < FLUSH_DURATION
+
+    assert flushed.wait(timeout=2 * FLUSH_DURATION)
@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from helpers import project_tree
+from panoramic.cli import cli
+from panoramic.cli.paths import Paths
+
+CASSETTES_DIR = Path(__file__).parent / 'cassettes'
+# Smaller than the recorded physical data source response
+HTTP_CACHE_MAX_BYTES = 100
+# Recorded response bodies of the connections listing and of the pulled datasets, models and taxons
+LISTING_BYTES = 230
+PULLED_BYTES = 127 + 417 + 672
+# Fits the connections listing or the three pulled responses, but not all of them together
+LRU_CACHE_MAX_BYTES = PULLED_BYTES + LISTING_BYTES // 2
+
+
+@pytest.fixture(scope='module')
+def vcr_config(vcr_config):
+    return {**vcr_config, 'match_on': ['method', 'uri', 'conditional_headers']}
+
+
+def _cache_size():
+    return sum(f.stat().st_size for f in Paths.http_cache_dir().rglob('*') if f.is_file())
+
+
+def _list_connections(runner, *options):
+    result = runner.invoke(cli, [*options, 'list-connections'])
+    assert result.exit_code == 0, result.output
+    assert result.stdout.strip() == 'pano_snowflake_66'
+
+
+@pytest.mark.vcr
+def test_list_connections_cache_e2e(scenario, vcr):
+    scenario('pano-list-connections')
+    runner = CliRunner()
+
+    _list_connections(runner)
+    assert _cache_size() > 0
+
+    # Cached response is revalidated with its ETag and reused on 304 Not Modified
+    _list_connections(runner)
+    assert vcr.all_played
+
+
+@pytest.mark.vcr
+def test_list_connections_no_cache_e2e(scenario, vcr):
+    scenario('pano-list-connections')
+    runner = CliRunner()
+
+    _list_connections(runner)
+
+    # Cached response is ignored and fetched again without revalidation
+    _list_connections(runner, '--no-cache')
+    assert vcr.all_played
+
+
+@pytest.mark.vcr(str(CASSETTES_DIR / 'test_cache_e2e' / 'test_list_connections_no_cache_e2e.yaml'))
+def test_cache_eviction_e2e(scenario, monkeypatch, vcr):
+    scenario('pano-list-connections')
+    monkeypatch.setenv('PANO_HTTP_CACHE_MAX_BYTES', str(HTTP_CACHE_MAX_BYTES))
+    runner = CliRunner()
+
+    # Response larger than the whole cache is not kept, so the next listing is unconditional
+    _list_connections(runner)
+    _list_connections(runner)
+
+    assert vcr.all_played
+    assert _cache_size() <= HTTP_CACHE_MAX_BYTES
+
+
+@pytest.mark.vcr
+def test_cache_lru_eviction_e2e(scenario, monkeypatch, vcr):
+    scenario('pano-push-pull')
+    monkeypatch.setenv('PANO_HTTP_CACHE_MAX_BYTES', str(LRU_CACHE_MAX_BYTES))
+    runner = CliRunner()
+
+    _list_connections(runner)
+
+    # Pulled responses fill the cache, evicting the least recently used connections listing
+    result = runner.invoke(cli, ['pull', '-y'])
+    assert result.exit_code == 0, result.output
+    assert _cache_size() <= LRU_CACHE_MAX_BYTES
+
+    # Newer entries stay cached and are revalidated
+    result = runner.invoke(cli, ['pull', '-y'])
+    assert result.exit_code == 0, result.output
+
+    # Evicted listing is fetched again without revalidation
+    _list_connections(runner)
+    assert vcr.all_played
+    assert _cache_size() <= LRU_CACHE_MAX_BYTES
+
+
+@pytest.mark.vcr
+def test_pull_cache_e2e(scenario, vcr):
+    scenario('pano-push-pull')
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['pull', '-y'])
+    assert result.exit_code == 0, result.output
+    pulled_tree = project_tree()
+    assert pulled_tree
+
+    # Unchanged datasets, models and fields are revalidated with ETag or Last-Modified and answered with 304
+    result = runner.invoke(cli, ['pull', '-y'])
+    assert result.exit_code == 0, result.output
+    assert project_tree() == pulled_tree
+    assert vcr.all_played
@@ -0,0 +1,120 @@
+import json
+import socket
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from panoramic.cli import cli
+
+# Delays of fake servers answering authentication, the slowest one bounds total time of concurrent test
+DELAYS = [0.2, 0.4, 0.6, 0.8, 1.0, 1.2]
+# Driver import and thread scheduling on top of the slowest connection
+OVERHEAD = 1.0
+TIMEOUT = 1
+
+
+def _create_connection(runner, name, host, port):
+    result = runner.invoke(
+        cli,
+        [
+            'connection',
+            'create',
+            name,
+            '--type',
+            'postgres',
+            '--user',
+            'my-user',
+            '--host',
+            host,
+            '--port',
+            str(port),
+            '--database',
+            'my_db',
+            '--password',
+            'my-password',
+            '--no-test',
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+
+def _unused_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _test_connections(*args):
+    """Run connection test and return exit code, report keyed by connection name and wall time."""
+    # Keep stderr apart so stdout holds only the JSON report, also when the command fails
+    runner = CliRunner(mix_stderr=False)
+    start = time.monotonic()
+    result = runner.invoke(cli, ['connection', 'test', *args, '--format', 'json'])
+    wall_time = time.monotonic() - start
+
+    entries = json.loads(result.stdout)
+    assert isinstance(entries, list), result.stdout
+    assert all({'name', 'status'} <= entry.keys() for entry in entries), result.stdout
+    report = {entry['name']: entry for entry in entries}
+    return result.exit_code, report, wall_time
+
+
+@pytest.fixture
+def slow_connections(fake_postgres):
+    runner = CliRunner()
+    servers = {}
+    for i, delay in enumerate(DELAYS):
+        servers[f'slow-{i}'] = fake_postgres(delay=delay)
+        _create_connection(runner, f'slow-{i}', servers[f'slow-{i}'].host, servers[f'slow-{i}'].port)
+    return servers
+
+
+def test_connection_test_all_e2e(slow_connections):
+    exit_code, report, wall_time = _test_connections('--all')
+
+    assert exit_code == 0
+    assert report.keys() == slow_connections.keys()
+    for name, server in slow_connections.items():
+        assert report[name]['status'] == 'ok'
+        assert report[name]['latency_ms'] >= server.delay * 1000
+        # Each connection is tested over a single database connection
+        assert server.connections == 1
+    # Connections are tested concurrently, total time tracks the slowest one instead of the sum
+    assert max(DELAYS) <= wall_time < max(DELAYS) + OVERHEAD
+
+
+def test_connection_test_concurrency_e2e(slow_connections):
+    exit_code, report, wall_time = _test_connections('--all', '--concurrency', '1')
+
+    assert exit_code == 0
+    assert all(entry['status'] == 'ok' for entry in report.values())
+    # With a single worker connections are tested one after another
+    assert wall_time >= sum(DELAYS)
+
+
+def test_connection_test_filter_e2e(slow_connections):
+    exit_code, report, _ = _test_connections('--all', '--filter', 'slow-[0-2]')
+
+    assert exit_code == 0
+    assert set(report) == {'slow-0', 'slow-1', 'slow-2'}
+    assert all(server.connections == 0 for name, server in slow_connections.items() if name not in report)
+
+
+def test_connection_test_timeout_e2e(fake_postgres):
+    runner = CliRunner()
+    fast = fake_postgres()
+    hanging = fake_postgres(hang=True)
+    _create_connection(runner, 'fast', fast.host, fast.port)
+    _create_connection(runner, 'hanging', hanging.host, hanging.port)
+    _create_connection(runner, 'unreachable', '127.0.0.1', _unused_port())
+
+    exit_code, report, wall_time = _test_connections('--all', '--timeout', str(TIMEOUT))
+
+    # One failing connection fails the command but does not stop testing the others
+    assert exit_code == 1
+    assert report['fast']['status'] == 'ok'
+    assert report['hanging']['status'] == 'timeout'
+    assert report['unreachable']['status'] == 'error'
+    assert report['unreachable']['error']
+    assert wall_time < TIMEOUT + OVERHEAD
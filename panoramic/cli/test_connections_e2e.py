@@ -1,12 +1,21 @@
+import os
+import subprocess
+import sys
+import time
 from pathlib import Path
 
 import pytest
 import yaml
 from click.testing import CliRunner
 
+from helpers import run_connection_commands
 from panoramic.cli import cli
 from panoramic.cli.paths import Paths
 
+CONCURRENT_UPDATES = 20
+VERSIONS_URL = 'a1.panocdn.com/updates/pano-cli/versions.json'
+UPDATE_CHECK_TIMEOUT = 5
+
 
 @pytest.mark.vcr
 def test_connections_e2e(monkeypatch, tmpdir):
@@ -111,3 +120,101 @@ def test_connections_update_fail_e2e(monkeypatch, tmpdir):
     result = runner.invoke(cli, ['connection', 'update', 'my-connection'])
     assert result.exit_code == 1, result.output
     assert result.stdout.endswith('Error: Connection with name "my-connection" was not found.\n')
+
+
+@pytest.mark.vcr
+def test_update_check_cache_e2e(monkeypatch, tmpdir, count_requests):
+    monkeypatch.setattr(Path, 'home', lambda: Path(tmpdir))
+    monkeypatch.setenv('PANO_UPDATE_CHECK_ENABLED', 'true')
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['configure'], input='test-client-id\ntest-client-secret')
+    assert result.exit_code == 0, result.output
+
+    # Check runs in the background, wait for its result before starting the next command
+    deadline = time.monotonic() + UPDATE_CHECK_TIMEOUT
+    while not Paths.update_check_file().exists():
+        assert time.monotonic() < deadline, 'Update check result was not written'
+        time.sleep(0.01)
+
+    run_connection_commands(runner)
+
+    # Cassette holds a versions.json response for every command, result of the first check is reused by the others
+    assert count_requests('GET', VERSIONS_URL) == 1
+
+
+@pytest.mark.vcr
+def test_update_check_disabled_e2e(monkeypatch, tmpdir, count_requests):
+    monkeypatch.setattr(Path, 'home', lambda: Path(tmpdir))
+    monkeypatch.setenv('PANO_UPDATE_CHECK_ENABLED', 'false')
+    runner = CliRunner()
+
+    run_connection_commands(runner)
+
+    assert count_requests('GET', VERSIONS_URL) == 0
+    assert not Paths.update_check_file().exists()
+
+
+def test_connections_concurrent_update_e2e(monkeypatch, tmpdir):
+    monkeypatch.setattr(Path, 'home', lambda: Path(tmpdir))
+    runner = CliRunner()
+
+    # Create config
+    runner.invoke(cli, ['configure'], input='test-client-id\ntest-client-secret')
+
+    for i in range(CONCURRENT_UPDATES):
+        result = runner.invoke(
+            cli,
+            [
+                'connection',
+                'create',
+                f'my-connection-{i}',
+                '--type',
+                'postgres',
+                '--user',
+                'my-user',
+                '--host',
+                'localhost',
+                '--port',
+                '5432',
+                '--database',
+                'my_db',
+                '--password',
+                'my-password',
+                '--no-test',
+            ],
+        )
+        assert result.exit_code == 0, result.output
+
+    # Update every connection from a separate pano process at the same time
+    env = {**os.environ, 'HOME': str(tmpdir)}
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                '-c',
+                'from panoramic.cli import cli; cli()',
+                'connection',
+                'update',
+                f'my-connection-{i}',
+                '--database',
+                f'my-new-db-{i}',
+                '--no-test',
+            ],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        for i in range(CONCURRENT_UPDATES)
+    ]
+    for process in processes:
+        output, _ = process.communicate()
+        assert process.returncode == 0, output
+
+    with Paths.config_file().open() as f:
+        config = yaml.safe_load(f.read())
+
+    assert config['auth'] == {'client_id': 'test-client-id', 'client_secret': 'test-client-secret'}
+    assert {name: connection['database'] for name, connection in config['connections'].items()} == {
+        f'my-connection-{i}': f'my-new-db-{i}' for i in range(CONCURRENT_UPDATES)
+    }
@@ -1,37 +1,74 @@
+import json
+import time
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from click.testing import CliRunner
 
+from helpers import create_cleanup_fields
 from panoramic.cli import cli
 from panoramic.cli.paths import Paths
 
-TEST_CALCULATED_FIELD = """
+GENERATED_FIELDS = 3000
+
+GENERATED_FIELD = """
 api_version: v1
-slug: calculated_test_field
-display_name: Dataset test field
+slug: generated_field_{i}
+display_name: Generated field {i}
 group: Custom
-calculation: 10
-field_type: metric
+field_type: dimension
 data_type: text
 """
 
-TEST_ORPHANED_FIELD = """
+GENERATED_MODEL_FIELD = """
+  - field_map:
+      - generated_field_{i}
+    data_reference: '"COLUMN_{i}"'
+"""
+
+GENERATED_MODEL = """
 api_version: v1
-slug: orphan_test_field
-display_name: Dataset test field
-group: Custom
-field_type: metric
-data_type: text
+model_name: generated_model
+data_source: pano_snowflake_66.snowflake_sample_data.tpch_sf1.nation
+fields:
 """
 
 
+def _write_generated_model(field_indexes):
+    model = GENERATED_MODEL + ''.join(GENERATED_MODEL_FIELD.format(i=i) for i in field_indexes)
+    (Path('test_dataset') / 'generated_model.model.yaml').write_text(model)
+
+
+@pytest.fixture
+def chained_fields(scenario):
+    scenario('pano-field-cleanup-chained')
+    yield Paths.fields_dir(Path('test_dataset'))
+
+
+@pytest.fixture
+def generated_fields(scenario):
+    scenario('pano-field-cleanup')
+
+    fields_dir = Paths.fields_dir(Path('test_dataset'))
+    for i in range(GENERATED_FIELDS):
+        (fields_dir / f'generated_field_{i}.field.yaml').write_text(GENERATED_FIELD.format(i=i))
+    _write_generated_model(range(GENERATED_FIELDS))
+    yield fields_dir
+
+
+def _timed_cleanup():
+    runner = CliRunner()
+    start = time.monotonic()
+    result = runner.invoke(cli, ['field', 'cleanup', '-y'])
+    assert result.exit_code == 0, result.output
+    return time.monotonic() - start
+
+
 @pytest.fixture
-def create_fields(monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-field-cleanup')
-    (Paths.fields_dir(Path('test_dataset')) / 'orphan_test_field.field.yaml').write_text(TEST_ORPHANED_FIELD)
-    (Paths.fields_dir(Path('test_dataset')) / 'calculated_test_field.field.yaml').write_text(TEST_CALCULATED_FIELD)
+def create_fields(scenario):
+    scenario('pano-field-cleanup')
+    create_cleanup_fields()
     yield
 
 
@@ -52,8 +89,8 @@ def test_field_cleanup_e2e(create_fields):
 
 @pytest.mark.vcr
 @patch('panoramic.cli.command.delete_orphaned_fields')
-def test_field_cleanup_error_e2e(mock_delete, monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-push-pull')
+def test_field_cleanup_error_e2e(mock_delete, scenario):
+    scenario('pano-push-pull')
     mock_delete.side_effect = Exception('Test Exception')
 
     runner = CliRunner()
@@ -62,3 +99,65 @@ def test_field_cleanup_error_e2e(mock_delete, monkeypatch):
     assert result.exit_code == 1
     assert result.stdout.startswith('Error: Internal error occurred\nTraceback (most recent call last):\n')
     assert result.stdout.endswith('raise effect\nException: Test Exception\n\n')
+
+
+def test_field_cleanup_index_e2e(generated_fields):
+    cold_time = _timed_cleanup()
+    assert Paths.project_index_file().exists()
+    warm_time = _timed_cleanup()
+
+    # Warm run reads the persisted index instead of re-parsing every file
+    assert len(list(generated_fields.iterdir())) == GENERATED_FIELDS + 2
+    assert warm_time < cold_time / 2
+
+    # Changed model is re-parsed, so the field it no longer maps becomes orphaned
+    _write_generated_model(range(1, GENERATED_FIELDS))
+    _timed_cleanup()
+
+    assert not (generated_fields / 'generated_field_0.field.yaml').exists()
+    assert len(list(generated_fields.iterdir())) == GENERATED_FIELDS + 1
+
+
+@pytest.mark.vcr
+def test_field_cleanup_chained_e2e(chained_fields):
+    runner = CliRunner()
+    result = runner.invoke(cli, ['field', 'cleanup', '-y'])
+
+    assert result.exit_code == 0, result.output
+    # Fields used only through a chain of calculations are kept
+    assert {f.name for f in chained_fields.iterdir()} == {
+        'base_field.field.yaml',
+        'derived_field.field.yaml',
+        'chained_field.field.yaml',
+        'referenced_field.field.yaml',
+    }
+    assert {f.name for f in Paths.company_fields_dir().iterdir()} == {'dangling_field.field.yaml'}
+
+
+@pytest.mark.vcr
+def test_field_cleanup_dry_run_e2e(chained_fields):
+    fields_before = {f.name for f in chained_fields.iterdir()}
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ['field', 'cleanup', '--dry-run'])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout) == {
+        'orphaned_fields': [
+            {
+                'dataset_slug': 'test_dataset',
+                'slug': 'orphan_field',
+                'path': str(Path('test_dataset') / 'fields' / 'orphan_field.field.yaml'),
+            },
+        ],
+        'dangling_references': [
+            {
+                'dataset_slug': None,
+                'slug': 'dangling_field',
+                'reference': 'missing_field',
+                'path': str(Path('fields') / 'dangling_field.field.yaml'),
+            },
+        ],
+    }
+    # Dry run leaves files in place
+    assert {f.name for f in chained_fields.iterdir()} == fields_before
@@ -7,10 +7,18 @@ from click.testing import CliRunner
 from panoramic.cli import cli
 from panoramic.cli.paths import Paths
 
+SCAFFOLDED_FIELD = """api_version: v1
+data_type: text
+display_name: dataset_test_field
+field_type: dimension
+group: CLI
+slug: dataset_test_field
+"""
+
 
 @pytest.fixture
-def clear_fields(monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-field-scaffold')
+def clear_fields(scenario):
+    scenario('pano-field-scaffold')
     # delete field files
     for f in Paths.fields_dir(Path('test_dataset')).iterdir():
         f.unlink()
@@ -26,22 +34,50 @@ def test_field_scaffold_e2e(clear_fields):
 
     assert result.exit_code == 0
     assert {f.name for f in fields_dir.iterdir()} == {'dataset_test_field.field.yaml'}
-    assert (
-        (fields_dir / 'dataset_test_field.field.yaml').read_text()
-        == """api_version: v1
-data_type: text
-display_name: dataset_test_field
-field_type: dimension
-group: CLI
-slug: dataset_test_field
-"""
-    )
+    assert (fields_dir / 'dataset_test_field.field.yaml').read_text() == SCAFFOLDED_FIELD
+
+
+@pytest.mark.vcr
+def test_field_scaffold_cached_metadata_e2e(clear_fields, count_requests):
+    fields_dir = Paths.fields_dir(Path('test_dataset'))
+    runner = CliRunner()
+
+    # Scan stores column metadata of the scanned table in local cache
+    result = runner.invoke(cli, ['scan', 'pano_snowflake_66', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.NATION'])
+    assert result.exit_code == 0, result.output
+    assert any(Paths.metadata_cache_dir().iterdir())
+    metadata_requests = count_requests(url_part='/federated/metadata/')
+
+    result = runner.invoke(cli, ['field', 'scaffold', '-y'])
+
+    assert result.exit_code == 0, result.output
+    assert (fields_dir / 'dataset_test_field.field.yaml').read_text() == SCAFFOLDED_FIELD
+    assert count_requests(url_part='/federated/metadata/') == metadata_requests
+
+
+@pytest.mark.vcr
+def test_field_scaffold_refresh_e2e(clear_fields, count_requests, vcr):
+    fields_dir = Paths.fields_dir(Path('test_dataset'))
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['scan', 'pano_snowflake_66', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.NATION'])
+    assert result.exit_code == 0, result.output
+    assert any(Paths.metadata_cache_dir().iterdir())
+    columns_requests = count_requests('POST', '/columns')
+
+    # Cached metadata is bypassed and fetched again with a columns job
+    result = runner.invoke(cli, ['field', 'scaffold', '-y', '--refresh'])
+
+    assert result.exit_code == 0, result.output
+    assert (fields_dir / 'dataset_test_field.field.yaml').read_text() == SCAFFOLDED_FIELD
+    assert count_requests('POST', '/columns') == columns_requests + 1
+    assert vcr.all_played
 
 
 @pytest.mark.vcr
 @patch('panoramic.cli.command.scaffold_missing_fields')
-def test_field_scaffold_error_e2e(mock_scaffold, monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-push-pull')
+def test_field_scaffold_error_e2e(mock_scaffold, scenario):
+    scenario('pano-push-pull')
     mock_scaffold.side_effect = Exception('Test Exception')
 
     runner = CliRunner()
@@ -1,4 +1,3 @@
-from pathlib import Path
 from unittest.mock import patch
 
 import pytest
@@ -8,8 +7,8 @@ from panoramic.cli import cli
 
 
 @pytest.mark.vcr
-def test_list_connections_e2e(monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-list-connections')
+def test_list_connections_e2e(scenario):
+    scenario('pano-list-connections')
     runner = CliRunner()
 
     result = runner.invoke(cli, ['list-connections'])
@@ -20,8 +19,8 @@ def test_list_connections_e2e(monkeypatch):
 
 @patch('panoramic.cli.command.list_connections')
 @pytest.mark.vcr
-def test_list_connections_error_e2e(mock_list_connections, monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-list-connections')
+def test_list_connections_error_e2e(mock_list_connections, scenario):
+    scenario('pano-list-connections')
     runner = CliRunner()
 
     mock_list_connections.side_effect = Exception('Test Exception')
@@ -0,0 +1,147 @@
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from panoramic.cli import cli
+from panoramic.cli.paths import FileExtension, Paths, PresetFileName
+
+LOAD_TABLES = 64
+LOAD_PARALLEL = 32
+JOB_DURATION = 0.2
+# Tables job, then refresh and columns jobs of two waves of tables, each waiting one Retry-After
+MAX_SCAN_WALL_TIME = 10
+
+LOAD_DATASETS = 100
+LOAD_MODELS_PER_DATASET = 50
+LOAD_BATCH_SIZE = 100
+
+RATE_LIMIT = 5
+
+CONCURRENT_LISTINGS = 8
+LISTING_LATENCY = 0.5
+
+LOAD_MODEL = """
+api_version: v1
+model_name: load_model_{m}
+data_source: pano_snowflake_66.scale_db.public.table_{m:05d}
+fields:
+  - field_map:
+      - load_field
+    data_reference: '"COLUMN_0"'
+"""
+
+LOAD_FIELD = """
+aggregation:
+  type: group_by
+api_version: v1
+slug: load_field
+display_name: Load field
+group: Custom
+field_type: dimension
+data_type: text
+"""
+
+
+@pytest.fixture
+def scan_scenario(scenario):
+    scenario('pano-scan')
+
+
+@pytest.fixture
+def load_project(scenario):
+    """Generate project with LOAD_DATASETS datasets of LOAD_MODELS_PER_DATASET models each."""
+    scenario('pano-push-bulk')
+
+    dataset_dirs = [Path(f'load_dataset_{d}') for d in range(LOAD_DATASETS)]
+    for d, dataset_dir in enumerate(dataset_dirs):
+        Paths.fields_dir(dataset_dir).mkdir(parents=True)
+        (dataset_dir / PresetFileName.DATASET_YAML.value).write_text(f'dataset_slug: load_dataset_{d}\n')
+        (Paths.fields_dir(dataset_dir) / f'load_field{FileExtension.FIELD_YAML.value}').write_text(LOAD_FIELD)
+        for m in range(LOAD_MODELS_PER_DATASET):
+            (dataset_dir / f'load_model_{m}{FileExtension.MODEL_YAML.value}').write_text(LOAD_MODEL.format(m=m))
+    yield dataset_dirs
+
+
+def test_scan_load_e2e(scan_scenario, mock_api):
+    api = mock_api(tables=LOAD_TABLES, job_duration=JOB_DURATION, latency=0.01)
+    runner = CliRunner()
+
+    start = time.monotonic()
+    result = runner.invoke(
+        cli, ['scan', api.connection, '--parallel', str(LOAD_PARALLEL), '--filter', 'SCALE_DB.PUBLIC.%']
+    )
+    wall_time = time.monotonic() - start
+
+    assert result.exit_code == 0, result.output
+    assert len(list(Paths.scanned_dir().glob('*.model.yaml'))) == LOAD_TABLES
+    # Tables are scanned concurrently up to the parallelism limit
+    assert 1 < api.max_in_flight <= LOAD_PARALLEL
+    assert wall_time < MAX_SCAN_WALL_TIME
+
+
+def test_push_load_e2e(load_project, mock_api):
+    api = mock_api()
+    models = LOAD_DATASETS * LOAD_MODELS_PER_DATASET
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['push', '-y', '--batch-size', str(LOAD_BATCH_SIZE)])
+
+    assert result.exit_code == 0, result.output
+    assert len(api.virtual_data_sources) == LOAD_DATASETS
+    assert len(api.models) == models
+    assert len(api.taxons) == LOAD_DATASETS
+    assert api.requests['PUT /model/batch'] == math.ceil(models / LOAD_BATCH_SIZE)
+    assert api.requests['PUT /model/'] == 0
+
+    for dataset_dir in load_project:
+        shutil.rmtree(dataset_dir)
+
+    result = runner.invoke(cli, ['push', '-y', '--batch-size', str(LOAD_BATCH_SIZE)])
+
+    assert result.exit_code == 0, result.output
+    assert api.virtual_data_sources == api.models == api.taxons == {}
+
+
+def test_scan_rate_limit_e2e(scan_scenario, mock_api):
+    api = mock_api(tables=RATE_LIMIT * 4, rate_limit=RATE_LIMIT)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['scan', api.connection, '--parallel', '8', '--filter', 'SCALE_DB.PUBLIC.%'])
+
+    # Throttled requests are retried after Retry-After instead of failing the scan
+    assert result.exit_code == 0, result.output
+    assert api.throttled > 0
+    assert len(list(Paths.scanned_dir().glob('*.model.yaml'))) == RATE_LIMIT * 4
+
+
+def test_list_connections_load_e2e(scenario, mock_api, isolated_home):
+    scenario('pano-list-connections')
+    api = mock_api(latency=LISTING_LATENCY)
+
+    # List connections from separate pano processes at the same time
+    env = {**os.environ, 'HOME': str(isolated_home)}
+    processes = [
+        subprocess.Popen(
+            [sys.executable, '-c', 'from panoramic.cli import cli; cli()', 'list-connections'],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        for _ in range(CONCURRENT_LISTINGS)
+    ]
+    for process in processes:
+        stdout, stderr = process.communicate()
+        assert process.returncode == 0, stderr
+        assert stdout.strip() == api.connection
+
+    assert api.requests['GET /physical-data-source/'] == CONCURRENT_LISTINGS
+    # Slow listings are served side by side instead of queueing behind each other
+    assert api.max_in_flight > 1
@@ -1,82 +1,82 @@
+import math
+import shutil
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 from click.testing import CliRunner
 
+from helpers import create_project, project_tree
 from panoramic.cli import cli
 from panoramic.cli.paths import FileExtension, PresetFileName, Paths
 
-TEST_DATASET = """
-dataset_slug: test_dataset
-display_name: Test Dataset
+CASSETTES_DIR = Path(__file__).parent / 'cassettes'
+
+BULK_DATASETS = 50
+BULK_BATCH_SIZE = 25
+
+PULL_DATASETS = 8
+PULL_MODELS_PER_DATASET = 3
+PULL_FIELDS_PER_DATASET = 3
+# Latency of mock API responses, long enough for concurrent requests to overlap
+PULL_LATENCY = 0.1
+
+BULK_DATASET = """
+dataset_slug: bulk_dataset_{i}
+display_name: Bulk Dataset {i}
 """
 
-TEST_MODEL = """
+BULK_MODEL = """
 api_version: v1
-model_name: test_model
+model_name: bulk_model_{i}
 data_source: pano_snowflake_panoramic_cli_e_2_e_c_2_m_6_qp_4_u.snowflake_sample_data.tpch_sf1.nation
 fields:
   - field_map:
-      - dataset_test_field
+      - bulk_field_{i}
     data_reference: '"N_NAME"'
-joins:
-  - to_model: other_model
-    relationship: many_to_one
-    join_type: left
-    fields:
-      - dataset_test_field
-identifiers:
-  - dataset_test_field
 """
 
-TEST_COMPANY_FIELD = """
+BULK_FIELD = """
 aggregation:
   type: group_by
 api_version: v1
-slug: company_test_field
-display_name: Company test field
+slug: bulk_field_{i}
+display_name: Bulk field {i}
 group: Custom
-calculation: 2 + 2
 field_type: dimension
 data_type: text
 """
 
-TEST_DATASET_FIELD = """
-aggregation:
-  type: sum
-api_version: v1
-slug: dataset_test_field
-display_name: Dataset test field
-group: Custom
-field_type: metric
-data_type: text
-"""
+TOKEN_URL = '/oauth2/auscsj124wDoFObOJ4x6/v1/token'
+
+
+def _count_write_requests(count_requests):
+    return count_requests('PUT') + count_requests('DELETE') + count_requests('POST', '/taxonomy/')
+
+
+@pytest.fixture
+def push_pull_scenario(scenario):
+    scenario('pano-push-pull')
+
+
+@pytest.fixture
+def bulk_datasets(scenario):
+    scenario('pano-push-bulk')
+    dataset_dirs = [Path(f'bulk_dataset_{i}') for i in range(BULK_DATASETS)]
+    for i, dataset_dir in enumerate(dataset_dirs):
+        Paths.fields_dir(dataset_dir).mkdir(parents=True, exist_ok=True)
+        (dataset_dir / PresetFileName.DATASET_YAML.value).write_text(BULK_DATASET.format(i=i))
+        (dataset_dir / f'bulk_model_{i}{FileExtension.MODEL_YAML.value}').write_text(BULK_MODEL.format(i=i))
+        (Paths.fields_dir(dataset_dir) / f'bulk_field_{i}{FileExtension.FIELD_YAML.value}').write_text(
+            BULK_FIELD.format(i=i)
+        )
+
+    yield dataset_dirs
 
 
 @pytest.mark.vcr
-def test_push_pull_e2e(monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-push-pull')
-    dataset_dir = Path('test_dataset')
-    dataset_file: Path = dataset_dir / PresetFileName.DATASET_YAML.value
-    model_file: Path = dataset_dir / f'test_model{FileExtension.MODEL_YAML.value}'
-
-    # Create company scoped field
-    company_fields_dir = Paths.fields_dir(Path.cwd())
-    company_fields_dir.mkdir(exist_ok=True)
-    company_field_file: Path = company_fields_dir / f'company_test_field{FileExtension.FIELD_YAML.value}'
-    company_field_file.write_text(TEST_COMPANY_FIELD)
-
-    # Create dataset and model to push
-    dataset_dir.mkdir(exist_ok=True)
-    dataset_file.write_text(TEST_DATASET)
-    model_file.write_text(TEST_MODEL)
-    # Create dataset scoped field
-    dataset_fields_dir = Paths.fields_dir(dataset_dir)
-    dataset_fields_dir.mkdir(exist_ok=True)
-
-    dataset_field_file: Path = dataset_fields_dir / f'dataset_test_field{FileExtension.FIELD_YAML.value}'
-    dataset_field_file.write_text(TEST_DATASET_FIELD)
+def test_push_pull_e2e(push_pull_scenario):
+    dataset_file, model_file, company_field_file, dataset_field_file = create_project()
 
     # Push dataset and model
     runner = CliRunner()
@@ -113,10 +113,170 @@ def test_push_pull_e2e(monkeypatch):
     assert result.exit_code == 0
 
 
+@pytest.mark.vcr
+def test_push_pull_token_cache_e2e(push_pull_scenario, count_requests):
+    runner = CliRunner()
+    project_files = create_project()
+
+    # Push fetches a single token shared by all API clients
+    result = runner.invoke(cli, ['push', '-y'])
+    assert result.exit_code == 0, result.output
+    assert count_requests('POST', TOKEN_URL) == 1
+
+    # Token is cached on disk and readable only by its owner
+    token_files = list(Paths.token_cache_dir().iterdir())
+    assert len(token_files) == 1
+    assert token_files[0].stat().st_mode & 0o077 == 0
+
+    for f in project_files:
+        f.unlink()
+
+    # Pull reuses the cached token
+    result = runner.invoke(cli, ['pull', '-y'])
+    assert result.exit_code == 0, result.output
+    assert all(f.exists() for f in project_files)
+    assert count_requests('POST', TOKEN_URL) == 1
+
+    for f in project_files:
+        f.unlink()
+
+    # Push with a cold cache fetches exactly one new token
+    for f in token_files:
+        f.unlink()
+
+    result = runner.invoke(cli, ['push', '-y'])
+    assert result.exit_code == 0, result.output
+    assert count_requests('POST', TOKEN_URL) == 2
+
+
+@pytest.mark.vcr
+def test_push_no_changes_e2e(push_pull_scenario, count_requests):
+    project_files = create_project()
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['push', '-y'])
+    assert result.exit_code == 0, result.output
+    assert Paths.push_state_file().exists()
+    write_requests = _count_write_requests(count_requests)
+    assert write_requests > 0
+
+    # Nothing changed locally since the server acknowledged the last push
+    result = runner.invoke(cli, ['push', '-y'])
+    assert result.exit_code == 0, result.output
+    assert _count_write_requests(count_requests) == write_requests
+
+    # Deletes are derived from the push state without fetching remote state
+    get_requests = count_requests('GET')
+    for f in project_files:
+        f.unlink()
+
+    result = runner.invoke(cli, ['push', '-y'])
+    assert result.exit_code == 0, result.output
+    assert count_requests('GET') == get_requests
+    assert count_requests('DELETE') == 2
+    assert count_requests('POST', '/taxonomy/taxons/delete') == 2
+
+
+@pytest.mark.vcr
+def test_push_bulk_e2e(bulk_datasets, count_requests):
+    batches = math.ceil(BULK_DATASETS / BULK_BATCH_SIZE)
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['push', '-y', '--batch-size', str(BULK_BATCH_SIZE)])
+    assert result.exit_code == 0, result.output
+    # Datasets, models and fields are upserted in batches, not one request per object
+    assert count_requests('PUT', '/virtual-data-source/batch') == batches
+    assert count_requests('PUT', '/model/batch') == batches
+    assert count_requests('POST', '/taxonomy/taxons?') == batches
+
+    for dataset_dir in bulk_datasets:
+        shutil.rmtree(dataset_dir)
+
+    result = runner.invoke(cli, ['push', '-y', '--batch-size', str(BULK_BATCH_SIZE)])
+    assert result.exit_code == 0, result.output
+    assert count_requests('POST', '/model/delete') == batches
+    assert count_requests('POST', '/virtual-data-source/delete') == batches
+    assert count_requests('POST', '/taxonomy/taxons/delete') == batches
+    assert count_requests(url_part='diesel.panoramicapi.com') <= 2 + 6 * batches
+
+
+@pytest.mark.vcr
+def test_push_resume_e2e(bulk_datasets, count_requests, vcr):
+    batches = math.ceil(BULK_DATASETS / BULK_BATCH_SIZE)
+    runner = CliRunner()
+    push_args = ['push', '-y', '--batch-size', str(BULK_BATCH_SIZE)]
+
+    # Second batch of models fails with 503 after both batches of datasets and the first one of models were pushed
+    result = runner.invoke(cli, push_args)
+    assert result.exit_code == 1, result.output
+    assert Paths.push_journal_file().exists()
+    assert count_requests('PUT', '/model/batch') == batches
+
+    # Acknowledged objects are skipped, only the failed batch of models and the fields are pushed
+    result = runner.invoke(cli, [*push_args, '--resume'])
+    assert result.exit_code == 0, result.output
+    assert count_requests('GET') == 2
+    assert count_requests('PUT', '/virtual-data-source/batch') == batches
+    assert count_requests('PUT', '/model/batch') == batches + 1
+    assert count_requests('POST', '/taxonomy/taxons?') == batches
+    assert vcr.all_played
+    # Journal is removed and push state written once the push completes
+    assert not Paths.push_journal_file().exists()
+    assert Paths.push_state_file().exists()
+
+
+def test_pull_parallel_e2e(push_pull_scenario, mock_api):
+    api = mock_api(tables=PULL_DATASETS * PULL_MODELS_PER_DATASET, latency=PULL_LATENCY)
+    api.populate(
+        datasets=PULL_DATASETS,
+        models_per_dataset=PULL_MODELS_PER_DATASET,
+        fields_per_dataset=PULL_FIELDS_PER_DATASET,
+        company_fields=PULL_FIELDS_PER_DATASET,
+    )
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['pull', '-y', '--parallel', '1'])
+    assert result.exit_code == 0, result.output
+    sequential_tree = project_tree()
+    assert len(list(Path.cwd().glob('scale_dataset_*'))) == PULL_DATASETS
+    assert api.max_in_flight == 1
+
+    for path in sequential_tree:
+        Path(path).unlink()
+
+    result = runner.invoke(cli, ['pull', '-y', '--parallel', str(PULL_DATASETS)])
+    assert result.exit_code == 0, result.output
+    assert project_tree() == sequential_tree
+    # Datasets are fetched concurrently, so their requests overlap on the server
+    assert api.max_in_flight > 1
+
+
+@pytest.mark.vcr(str(CASSETTES_DIR / 'test_push_pull_e2e' / 'test_push_pull_e2e.yaml'))
+def test_push_trace_e2e(push_pull_scenario, monkeypatch, trace_file, read_trace, replayed_requests):
+    # Enable tracing through command line option instead of environment variable
+    monkeypatch.delenv('PANO_TRACE')
+    project_files = create_project()
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['--trace', str(trace_file), 'push', '-y'])
+    assert result.exit_code == 0, result.output
+
+    for f in project_files:
+        f.unlink()
+
+    result = runner.invoke(cli, ['--trace', str(trace_file), 'push', '-y'])
+    assert result.exit_code == 0, result.output
+
+    spans, traced_requests = read_trace()
+    assert traced_requests == replayed_requests()
+    assert {'auth', 'file.parse', 'push.diff'} <= {span['name'] for span in spans}
+    assert sum(span['bytes_sent'] for span in spans) > 0
+
+
 @pytest.mark.vcr
 @patch('panoramic.cli.command.push')
-def test_push_error_e2e(mock_push, monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-push-pull')
+def test_push_error_e2e(mock_push, scenario):
+    scenario('pano-push-pull')
     mock_push.side_effect = Exception('Test Exception')
 
     runner = CliRunner()
@@ -129,8 +289,8 @@ def test_push_error_e2e(mock_push, monkeypatch):
 
 @pytest.mark.vcr
 @patch('panoramic.cli.command.pull')
-def test_pull_error_e2e(mock_pull, monkeypatch):
-    monkeypatch.chdir(Path('e2e') / 'scenarios' / 'pano-push-pull')
+def test_pull_error_e2e(mock_pull, scenario):
+    scenario('pano-push-pull')
     mock_pull.side_effect = Exception('Test Exception')
 
     runner = CliRunner()
@@ -1,32 +1,133 @@
+import json
 import os
+import shutil
+import tracemalloc
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
+import yaml
 from click.testing import CliRunner
+from vcr import VCR
 
 from panoramic.cli import cli
 from panoramic.cli.paths import Paths
 
+TPCH_MODEL_FILES = {
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.nation.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.orders.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.supplier.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.lineitem.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.partsupp.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.region.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.part.model.yaml',
+    'pano_snowflake_66.snowflake_sample_data.tpch_sf1.customer.model.yaml',
+}
 
-@pytest.fixture(autouse=True)
-def handle_scanned_dir(monkeypatch):
-    test_dir = Path('e2e') / 'scenarios' / 'pano-scan'
-    monkeypatch.chdir(test_dir)
+CASSETTES_DIR = Path(__file__).parent / 'cassettes'
+TOKEN_URL = 'https://id.panoramichq.com/oauth2/auscsj124wDoFObOJ4x6/v1/token'
+DIESEL_URL = 'https://diesel.panoramicapi.com/api/v1/federated'
+COMPANY_SLUG = 'panoramic-z5y1clyi'
+RESULTS_PAGE_SIZE = 500
+# Peak memory of a scan may not grow with the number of wide tables
+MEMORY_CEILING_RATIO = 2
+# Rows sampled per table when looking for identifier candidates, so large tables like LINEITEM are not fully evaluated
+IDENTIFIER_SAMPLE_LIMIT = 10000
+NATION_MODEL_FILE = 'pano_snowflake_66.snowflake_sample_data.tpch_sf1.nation.model.yaml'
+# Refresh job of NATION whose status poll fails with 503 in the resume cassette, interrupting the scan
+NATION_REFRESH_JOB_ID = '205d37a6-6a86-a5bf-ff5f-ba6226106000'
 
-    # Clean scanned fields directory
-    if Paths.scanned_fields_dir().exists():
-        for f in Paths.scanned_fields_dir().glob('*'):
-            f.unlink()
 
-        os.rmdir(Paths.scanned_fields_dir())
+def _interaction(method, uri, data):
+    return {
+        'request': {'body': None, 'headers': {}, 'method': method, 'uri': uri},
+        'response': {
+            'body': {'string': json.dumps(data if uri == TOKEN_URL else {'data': data})},
+            'headers': {'Content-Type': ['application/json']},
+            'status': {'code': 200, 'message': 'OK'},
+        },
+    }
 
-    # Clean scanned models directory
-    for f in Paths.scanned_dir().glob('*'):
-        f.unlink()
 
-    yield
+def _job_interactions(method, uri, job_id, results=None):
+    interactions = [
+        _interaction(method, uri, {'job_id': job_id}),
+        _interaction('GET', f'{DIESEL_URL}/metadata/job/{job_id}', {'job_status': 'COMPLETED'}),
+    ]
+    if results is not None:
+        for offset in range(0, max(len(results), 1), RESULTS_PAGE_SIZE):
+            interactions.append(
+                _interaction(
+                    'GET',
+                    f'{DIESEL_URL}/metadata/job/{job_id}/results?offset={offset}&limit={RESULTS_PAGE_SIZE}',
+                    results[offset : offset + RESULTS_PAGE_SIZE],
+                )
+            )
+    return interactions
 
+
+def _write_synthetic_cassette(path, tables, columns):
+    """Write JSON cassette scanning `tables` synthetic tables with `columns` columns each."""
+    table_names = [f'SYNTHETIC_DB.WIDE.TABLE_{t}' for t in range(tables)]
+    interactions = [
+        _interaction('POST', TOKEN_URL, {'token_type': 'Bearer', 'expires_in': 3600, 'access_token': 'synthetic'})
+    ]
+    interactions += _job_interactions(
+        'POST',
+        f'{DIESEL_URL}/metadata/pano_snowflake_66/tables'
+        f'?company_slug={COMPANY_SLUG}&table_filter=SYNTHETIC_DB.WIDE.%25',
+        'tables',
+        [
+            {'data_source': f'pano_snowflake_66.{name}', 'model_name': f'pano_snowflake_66.{name.lower()}'}
+            for name in table_names
+        ],
+    )
+    for t, name in enumerate(table_names):
+        interactions += _job_interactions(
+            'POST',
+            f'{DIESEL_URL}/metadata/pano_snowflake_66/refresh?table_name={name}&company_slug={COMPANY_SLUG}',
+            f'refresh-{t}',
+        )
+        interactions += _job_interactions(
+            'POST',
+            f'{DIESEL_URL}/metadata/pano_snowflake_66/columns?company_slug={COMPANY_SLUG}&table_filter={name}',
+            f'columns-{t}',
+            [
+                {
+                    'aggregation_type': 'sum',
+                    'data_reference': f'"COLUMN_{c}"',
+                    'data_source': f'pano_snowflake_66.{name}',
+                    'data_type': 'DECIMAL',
+                    'field_map': [f'column_{c}'],
+                    'model_name': f'pano_snowflake_66.{name.lower()}',
+                    'taxon_type': 'metric',
+                    'validation_type': 'numeric',
+                }
+                for c in range(columns)
+            ],
+        )
+
+    path.write_text(json.dumps({'interactions': interactions, 'version': 1}))
+    return path
+
+
+def _scan_peak_memory(cassette_path, vcr_config):
+    """Scan synthetic schema replayed from the cassette and return peak traced memory in bytes."""
+    with VCR(**vcr_config).use_cassette(str(cassette_path), serializer='json', record_mode='none'):
+        tracemalloc.start()
+        try:
+            result = CliRunner().invoke(
+                cli, ['scan', 'pano_snowflake_66', '--parallel', '1', '--filter', 'SYNTHETIC_DB.WIDE.%']
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    assert result.exit_code == 0, result.output
+    return peak
+
+
+def _clean_scanned_dir():
     # Clean scanned fields directory
     if Paths.scanned_fields_dir().exists():
         for f in Paths.scanned_fields_dir().glob('*'):
@@ -38,6 +139,15 @@ def handle_scanned_dir(monkeypatch):
     for f in Paths.scanned_dir().glob('*'):
         f.unlink()
 
+    # Clean scan manifest so every test starts with a full scan
+    if Paths.scan_manifest_file().exists():
+        Paths.scan_manifest_file().unlink()
+
+
+@pytest.fixture(autouse=True)
+def scan_scenario(scenario):
+    scenario('pano-scan')
+
 
 def _drop_running_status(response):
     """Speed up execution of e2e by dropping status=RUNNING responses."""
@@ -64,16 +174,7 @@ def test_scan_e2e():
     )
 
     assert result.exit_code == 0
-    assert {f.name for f in Paths.scanned_dir().iterdir()} == {
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.nation.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.orders.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.supplier.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.lineitem.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.partsupp.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.region.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.part.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.customer.model.yaml',
-    }
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == TPCH_MODEL_FILES
 
 
 @pytest.mark.vcr
@@ -94,16 +195,177 @@ def test_scan_id_generator_e2e():
     )
 
     assert result.exit_code == 0
-    assert {f.name for f in Paths.scanned_dir().iterdir()} == {
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.nation.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.orders.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.supplier.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.lineitem.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.partsupp.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.region.model.yaml',
-        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.part.model.yaml',
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == TPCH_MODEL_FILES
+
+
+def _scan_identifiers(runner, table_filter):
+    result = runner.invoke(
+        cli,
+        [
+            'scan',
+            'pano_snowflake_66',
+            '--batch',
+            '--generate-identifiers',
+            '--identifier-sample-limit',
+            str(IDENTIFIER_SAMPLE_LIMIT),
+            '--filter',
+            table_filter,
+        ],
+    )
+    assert result.exit_code == 0, result.output
+
+
+@pytest.mark.vcr
+def test_scan_id_batch_e2e(count_requests, vcr):
+    runner = CliRunner()
+
+    _scan_identifiers(runner, 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.NATION')
+    single_table_requests = count_requests(url_part='/identifier/')
+    nation_model = yaml.safe_load((Paths.scanned_dir() / NATION_MODEL_FILE).read_text())
+    assert nation_model['identifiers'] == ['n_nationkey', 'n_name']
+
+    shutil.rmtree(Paths.identifier_cache_dir())
+    _clean_scanned_dir()
+
+    # All tables are evaluated by a single identifier job, same as one table
+    _scan_identifiers(runner, 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%')
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == TPCH_MODEL_FILES
+    assert count_requests(url_part='/identifier/') == 2 * single_table_requests
+    assert count_requests('POST', '/identifier/') == 2
+    assert vcr.all_played
+
+
+@pytest.mark.vcr
+def test_scan_id_cache_e2e(count_requests, vcr):
+    runner = CliRunner()
+
+    _scan_identifiers(runner, 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%')
+    scanned_files = {f.name: f.read_text() for f in Paths.scanned_dir().iterdir()}
+    identifier_requests = count_requests(url_part='/identifier/')
+    assert any(Paths.identifier_cache_dir().iterdir())
+
+    _clean_scanned_dir()
+
+    # Columns of no table changed, so identifiers are reused from the cache instead of evaluated again
+    _scan_identifiers(runner, 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%')
+    assert count_requests(url_part='/identifier/') == identifier_requests
+    assert {f.name: f.read_text() for f in Paths.scanned_dir().iterdir()} == scanned_files
+    assert vcr.all_played
+
+
+@pytest.mark.vcr
+def test_scan_batch_e2e(count_requests):
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli, ['scan', 'pano_snowflake_66', '--batch', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+    )
+
+    assert result.exit_code == 0, result.output
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == TPCH_MODEL_FILES
+    # Single columns job for the whole filter instead of refresh + columns job per table
+    assert count_requests('POST', '/refresh') == 0
+    assert count_requests('POST', '/columns') == 1
+    # Columns job submit, status poll and a single page of results
+    assert count_requests(url_part='diesel.panoramicapi.com') == 3
+
+
+@pytest.mark.vcr
+def test_scan_parallel_e2e():
+    runner = CliRunner()
+    scan_args = ['scan', 'pano_snowflake_66', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+
+    result = runner.invoke(cli, [*scan_args, '--parallel', '1'])
+    assert result.exit_code == 0, result.output
+    sequential_files = {f.name: f.read_text() for f in Paths.scanned_dir().iterdir()}
+
+    _clean_scanned_dir()
+
+    result = runner.invoke(cli, [*scan_args, '--parallel', '8'])
+    assert result.exit_code == 0, result.output
+    parallel_files = {f.name: f.read_text() for f in Paths.scanned_dir().iterdir()}
+
+    assert set(parallel_files) == TPCH_MODEL_FILES
+    assert parallel_files == sequential_files
+
+
+@pytest.mark.vcr
+def test_scan_incremental_e2e(count_requests):
+    runner = CliRunner()
+    scan_args = ['scan', 'pano_snowflake_66', '--parallel', '1', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+
+    result = runner.invoke(cli, scan_args)
+    assert result.exit_code == 0, result.output
+    assert Paths.scan_manifest_file().exists()
+    scanned_files = {f.name: f.stat().st_mtime_ns for f in Paths.scanned_dir().iterdir()}
+    assert set(scanned_files) == TPCH_MODEL_FILES
+    columns_requests = count_requests('POST', '/columns')
+
+    # Nothing changed since the last scan, so only the table listing is fetched again
+    result = runner.invoke(cli, scan_args)
+    assert result.exit_code == 0, result.output
+    assert count_requests('POST', '/columns') == columns_requests
+    assert {f.name: f.stat().st_mtime_ns for f in Paths.scanned_dir().iterdir()} == scanned_files
+
+
+@pytest.mark.vcr
+def test_scan_resume_e2e(count_requests, vcr):
+    runner = CliRunner()
+    scan_args = ['scan', 'pano_snowflake_66', '--parallel', '1', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+
+    result = runner.invoke(cli, scan_args)
+    assert result.exit_code == 1, result.output
+    assert Paths.scan_journal_file().exists()
+    scanned_files = {f.name: f.stat().st_mtime_ns for f in Paths.scanned_dir().iterdir()}
+    assert set(scanned_files) == {
         'pano_snowflake_66.snowflake_sample_data.tpch_sf1.customer.model.yaml',
+        'pano_snowflake_66.snowflake_sample_data.tpch_sf1.lineitem.model.yaml',
+    }
+
+    # Tables completed before the failure are skipped and the in-flight refresh job of NATION is polled again
+    result = runner.invoke(cli, [*scan_args, '--resume'])
+    assert result.exit_code == 0, result.output
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == TPCH_MODEL_FILES
+    assert {name: Paths.scanned_dir().joinpath(name).stat().st_mtime_ns for name in scanned_files} == scanned_files
+    assert count_requests('POST', '/tables') == 1
+    assert count_requests('POST', '/refresh') == len(TPCH_MODEL_FILES)
+    assert count_requests('GET', f'/metadata/job/{NATION_REFRESH_JOB_ID}') == 2
+    assert vcr.all_played
+    # Journal is removed once the scan completes
+    assert not Paths.scan_journal_file().exists()
+
+
+def test_scan_memory_e2e(tmp_path, vcr_config):
+    single_table = _write_synthetic_cassette(tmp_path / 'single_table.json', tables=1, columns=600)
+    many_tables = _write_synthetic_cassette(tmp_path / 'many_tables.json', tables=20, columns=600)
+
+    single_table_peak = _scan_peak_memory(single_table, vcr_config)
+    _clean_scanned_dir()
+    many_tables_peak = _scan_peak_memory(many_tables, vcr_config)
+
+    # Models are written as soon as they are complete, leaving no temporary files behind
+    assert {f.name for f in Paths.scanned_dir().iterdir()} == {
+        f'pano_snowflake_66.synthetic_db.wide.table_{t}.model.yaml' for t in range(20)
+    }
+    assert many_tables_peak < MEMORY_CEILING_RATIO * single_table_peak
+
+
+@pytest.mark.vcr(str(CASSETTES_DIR / 'test_scan_e2e' / 'test_scan_e2e.yaml'))
+def test_scan_trace_e2e(read_trace, replayed_requests):
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli, ['scan', 'pano_snowflake_66', '--parallel', '1', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+    )
+
+    assert result.exit_code == 0, result.output
+    spans, traced_requests = read_trace()
+    # Every request served from the cassette is accounted for in the trace
+    assert traced_requests == replayed_requests()
+    assert {'auth', 'metadata.job.submit', 'metadata.job.poll', 'metadata.job.results', 'file.write'} <= {
+        span['name'] for span in spans
     }
+    assert sum(span['bytes_received'] for span in spans) > 0
 
 
 @pytest.mark.vcr
@@ -0,0 +1,61 @@
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import pytest
+from click.testing import CliRunner
+
+from panoramic.cli import cli
+from panoramic.cli.paths import Paths
+
+# Each metadata job in the cassette reports RUNNING once with Retry-After: 1 before it completes
+RECORDED_POLLS = 34
+RETRY_AFTER = 1
+# Tables job, then refresh and columns jobs of all tables polled together: three rounds of Retry-After
+RETRY_ROUNDS = 3
+# Process startup, replaying requests and writing models on top of the Retry-After critical path
+OVERHEAD = 1.0
+# Tolerance of sleep timer resolution when checking poll cadence
+CLOCK_TOLERANCE = 0.05
+
+
+@pytest.fixture(autouse=True)
+def scan_scenario(scenario):
+    scenario('pano-scan')
+
+
+@pytest.fixture
+def poll_times(vcr, monkeypatch):
+    """Return times of replayed job status polls keyed by job path."""
+    times = defaultdict(list)
+    play_response = vcr.play_response
+
+    def _play_response(request):
+        path = urlsplit(request.uri).path
+        if request.method == 'GET' and '/metadata/job/' in path and not path.endswith('/results'):
+            times[path].append(time.monotonic())
+        return play_response(request)
+
+    monkeypatch.setattr(vcr, 'play_response', _play_response)
+    return times
+
+
+@pytest.mark.vcr
+def test_scan_polling_e2e(count_requests, poll_times):
+    runner = CliRunner()
+
+    start = time.monotonic()
+    result = runner.invoke(
+        cli, ['scan', 'pano_snowflake_66', '--parallel', '8', '--filter', 'SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.%']
+    )
+    wall_time = time.monotonic() - start
+
+    assert result.exit_code == 0, result.output
+    assert len(list(Paths.scanned_dir().glob('*.model.yaml'))) == 8
+    # No polls beyond the recorded RUNNING responses
+    assert count_requests('GET', '/metadata/job/') - count_requests('GET', '/results') == RECORDED_POLLS
+    # No job is polled again before its Retry-After has elapsed
+    for times in poll_times.values():
+        assert all(later - earlier >= RETRY_AFTER - CLOCK_TOLERANCE for earlier, later in zip(times, times[1:]))
+    # In-flight jobs share one poll loop, so the scan takes the Retry-After critical path and not a fixed interval
+    assert wall_time < RETRY_ROUNDS * RETRY_AFTER + OVERHEAD
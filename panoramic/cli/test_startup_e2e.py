@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from panoramic.cli import cli
+
+# Budget for total import time of a single pano invocation, override on slow CI agents
+IMPORT_TIME_BUDGET_MS = int(os.environ.get('PANO_IMPORT_TIME_BUDGET_MS', '300'))
+
+INVOKE_CLI = '''
+import sys
+from panoramic.cli import cli
+
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+'''
+
+LOAD_ALL_COMMANDS = '''
+import click
+from panoramic.cli import cli
+
+
+def load(group, ctx):
+    for name in group.list_commands(ctx):
+        command = group.get_command(ctx, name)
+        if isinstance(command, click.Group):
+            load(command, click.Context(command, parent=ctx))
+
+
+load(cli, click.Context(cli))
+'''
+
+
+def _import_times(script, args, home_dir):
+    """Run script with -X importtime and return self import time in microseconds keyed by module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script, *args],
+        env={**os.environ, 'HOME': str(home_dir), 'PANO_UPDATE_CHECK_ENABLED': 'false'},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, module = line[len('import time:') :].split('|')
+        import_times[module.strip()] = int(self_us)
+    return import_times
+
+
+def _cli_modules(import_times):
+    return {module for module in import_times if module.startswith('panoramic.cli')}
+
+
+@pytest.mark.parametrize('args', [['--help'], ['connection', 'list']])
+def test_startup_import_time_e2e(args, tmp_path):
+    import_times = _import_times(INVOKE_CLI, args, tmp_path)
+
+    assert sum(import_times.values()) / 1000 < IMPORT_TIME_BUDGET_MS
+
+
+def test_startup_lazy_commands_e2e(tmp_path):
+    connection_modules = _cli_modules(_import_times(INVOKE_CLI, ['connection', 'list'], tmp_path))
+    all_modules = _cli_modules(_import_times(LOAD_ALL_COMMANDS, [], tmp_path))
+
+    # Only modules of the invoked command are imported
+    assert connection_modules < all_modules
+
+
+def test_startup_help_e2e():
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['--help'])
+
+    assert result.exit_code == 0, result.output
+    for command in ['configure', 'connection', 'field', 'list-connections', 'pull', 'push', 'scan']:
+        assert f'  {command} ' in result.output
@@ -0,0 +1,83 @@
+import pytest
+from click.testing import CliRunner
+
+from helpers import create_project
+from panoramic.cli import cli
+from panoramic.cli.paths import FileExtension, Paths
+
+INVALID_YAML_MODEL = """
+api_version: v1
+model_name: invalid_yaml_model
+fields:
+  - field_map: [unclosed
+"""
+
+MISSING_KEY_FIELD = """
+api_version: v1
+slug: missing_key_field
+display_name: Missing key field
+group: Custom
+data_type: text
+"""
+
+UNKNOWN_KEY_DATASET = """
+dataset_slug: test_dataset
+display_name: Test Dataset
+unknown_key: value
+"""
+
+
+@pytest.fixture
+def invalid_project(scenario):
+    """Create valid project with one invalid file of each kind and return expected error locations."""
+    scenario('pano-push-pull')
+    dataset_file, *_ = create_project()
+    dataset_dir = dataset_file.parent
+
+    dataset_file.write_text(UNKNOWN_KEY_DATASET)
+    (dataset_dir / f'invalid_yaml_model{FileExtension.MODEL_YAML.value}').write_text(INVALID_YAML_MODEL)
+    (Paths.fields_dir(dataset_dir) / f'missing_key_field{FileExtension.FIELD_YAML.value}').write_text(
+        MISSING_KEY_FIELD
+    )
+
+    return [
+        f'{dataset_file}:4',
+        f'{dataset_dir / "invalid_yaml_model.model.yaml"}:6',
+        f'{Paths.fields_dir(dataset_dir) / "missing_key_field.field.yaml"}:2',
+    ]
+
+
+def test_validate_e2e(scenario):
+    scenario('pano-push-pull')
+    create_project()
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['validate'])
+
+    assert result.exit_code == 0, result.output
+
+
+@pytest.mark.parametrize('parallel', ['1', '4'])
+def test_validate_errors_e2e(invalid_project, parallel):
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['validate', '--parallel', parallel])
+
+    # All errors are reported in one pass, each with its file and line
+    assert result.exit_code == 1, result.output
+    for location in invalid_project:
+        assert location in result.output
+    assert result.output.count(': error: ') == len(invalid_project)
+
+
+def test_push_invalid_project_e2e(invalid_project, mock_api):
+    api = mock_api()
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ['push', '-y'])
+
+    # Project is validated before anything is pushed
+    assert result.exit_code == 1, result.output
+    for location in invalid_project:
+        assert location in result.output
+    assert sum(api.requests.values()) == 0